@@ -0,0 +1,8 @@
+# agent_based
+# Helpers shared by the example folders (test/, ex3/). Install the repo once with
+#   pip install -e .
+# and import them from any script, e.g. `from agent_based import StepBarrier`.
+
+from agent_based.step_barrier import LatencyHistogram, StepBarrier
+
+__all__ = ["LatencyHistogram", "StepBarrier"]
@@ -0,0 +1,124 @@
+# step_barrier.py
+# Step-versioned barrier for request/ACK rounds between agents.
+# A barrier is opened for one version (step, round, board version) with the set of
+# participants expected to answer. Arrivals for another version or from unknown
+# participants are rejected as stale. Completion can require everybody or a quorum,
+# waits time out so a lost message cannot hang the caller, and the time from open to
+# completion is recorded in a latency histogram.
+#
+# Shared by the n-Queens coordinators (test/coordinator.py) and the graph-coloring round
+# barriers (ex3/).
+#
+# Usage:
+#   barrier = StepBarrier(timeout=5.0)
+#   barrier.open(version, participants)
+#   ...                                       # on ACK: barrier.arrive(version, participant)
+#   if not await barrier.wait():
+#       resend_to(barrier.missing)            # per-participant retry, then wait() again
+
+import asyncio
+import math
+import time
+from typing import Dict, Hashable, Iterable, Optional, Set
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram in milliseconds (bucket k holds [2^(k-1), 2^k) ms)."""
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000.0
+        k = 0 if ms < 1.0 else int(math.log2(ms)) + 1
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound (ms) of the bucket holding quantile q."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen >= target:
+                return float(2 ** k)
+        return float(2 ** max(self.buckets))
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": 1000.0 * self.total_s / self.count if self.count else 0.0,
+            "p50_ms<=": self.quantile(0.5),
+            "p95_ms<=": self.quantile(0.95),
+            "max_ms": 1000.0 * self.max_s,
+        }
+
+
+class StepBarrier:
+    def __init__(self, quorum: Optional[int] = None, timeout: Optional[float] = None, name: str = "barrier"):
+        self.quorum = quorum              # None = all participants
+        self.timeout = timeout            # default per-wait timeout in seconds (None = forever)
+        self.name = name
+        self.version: Optional[Hashable] = None
+        self.expected: Set[Hashable] = set()
+        self.arrived: Set[Hashable] = set()
+        self.stale = 0                    # arrivals rejected for a wrong version or participant
+        self.timeouts = 0
+        self.histogram = LatencyHistogram()
+        self._need = 0
+        self._opened_at = 0.0
+        self._done = asyncio.Event()
+
+    def open(self, version: Hashable, participants: Iterable[Hashable]):
+        """Start waiting for `participants` under `version`. Earlier arrivals become stale."""
+        self.version = version
+        self.expected = set(participants)
+        self.arrived = set()
+        need = len(self.expected)
+        self._need = need if self.quorum is None else min(self.quorum, need)
+        self._opened_at = time.perf_counter()
+        self._done.clear()
+        if self._need == 0:
+            self._complete()
+
+    def arrive(self, version: Hashable, participant: Hashable) -> bool:
+        """Register one arrival. Returns False if it was stale and ignored."""
+        if version != self.version or participant not in self.expected:
+            self.stale += 1
+            return False
+        if participant not in self.arrived:
+            self.arrived.add(participant)
+            if len(self.arrived) >= self._need and not self._done.is_set():
+                self._complete()
+        return True
+
+    def _complete(self):
+        self.histogram.record(time.perf_counter() - self._opened_at)
+        self._done.set()
+
+    @property
+    def complete(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def missing(self) -> Set[Hashable]:
+        return self.expected - self.arrived
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for completion. Returns False if `timeout` (default: self.timeout) ran out."""
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            await self._done.wait()
+            return True
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return False
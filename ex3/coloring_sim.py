@@ -0,0 +1,293 @@
+# coloring_sim.py
+# Vectorized shadow simulator for the round-based ColorAgent protocol (ex3_decentralized.py).
+# One NumPy pass per round over a CSR adjacency replaces one asyncio task per agent and one
+# message per edge, so 10^5-10^6 nodes take seconds. Round semantics are the agents':
+#   - every agent that is not done sends its color to all neighbours
+#   - an agent that sees a neighbour with its own color is in conflict; if it has the largest
+#     id among itself and the conflicting neighbours it moves to a random other color
+#   - an agent without conflict counts a stable round and is done after STABLE_ROUNDS of them;
+#     done agents announce it once, then stop sending and deciding; their neighbours keep the
+#     final color, and an agent in conflict with a finished neighbour always moves itself, to a
+#     color no finished neighbour holds if there is one
+# With messaging="changes" (ColorAgent's change-driven variant) agents keep every neighbour's
+# last color and only send after a change. If finished neighbours hold every color an agent
+# can never settle and the run ends at max_rounds with converged=False.
+# The simulator is idealized synchronous: every message of a round arrives before anyone
+# decides. The agent run may see a neighbour's color a round late, so its round count can
+# differ; final colorings are checked the same way (check_coloring).
+#
+# Usage:
+#   csr = CSRGraph.from_networkx(graph)        # the graph passed to custom_topology
+#   result = simulate(csr, seed=0)             # rounds, messages, per-round curves
+#   check_coloring(csr, [agent.color for agent in topology.agents])
+#
+# Strategies (who moves in a conflict and which color it takes) are ColorAgent's, see there.
+# The command line runs them with stable_rounds=1, which is only safe here: agents whose
+# messages can arrive a round late need more (STABLE_ROUNDS in ex3_decentralized.py).
+#
+# Run (rounds and messages of every strategy on each graph; "+" = did not converge):
+#   python coloring_sim.py [n1,n2,...] [cycle|grid|regular|powerlaw ...]
+
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+COLORS = ["red", "green", "blue", "yellow", "purple", "orange"]   # as in ex3_decentralized.py
+STABLE_ROUNDS = 3
+MAX_ROUNDS = 10_000
+STRATEGIES = ("random", "free", "least_used", "luby", "dsatur")   # see ColorAgent
+
+
+class CSRGraph:
+    """Undirected graph as CSR: neighbours of node i are indices[indptr[i]:indptr[i+1]]."""
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray):
+        self.indptr = indptr
+        self.indices = indices
+        self.n = len(indptr) - 1
+        self.degree = np.diff(indptr)
+        self.rows = np.repeat(np.arange(self.n), self.degree)   # owner of each CSR entry
+
+    @classmethod
+    def from_edges(cls, n: int, edges: np.ndarray) -> "CSRGraph":
+        """edges: [E, 2] int array of node indices, each undirected edge once."""
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        src = np.concatenate([edges[:, 0], edges[:, 1]])
+        dst = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.lexsort((dst, src))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(indptr, dst[order])
+
+    @classmethod
+    def from_networkx(cls, graph) -> "CSRGraph":
+        """Node i is the i-th node of `graph`, the same order per_node(custom_topology(graph)) uses."""
+        index = {node: i for i, node in enumerate(graph.nodes)}
+        edges = np.array([(index[u], index[v]) for u, v in graph.edges if u != v], dtype=np.int64)
+        return cls.from_edges(len(index), edges)
+
+
+def _segment_max(csr: CSRGraph, values: np.ndarray, fill: int) -> np.ndarray:
+    """Per node, the max of `values` over its CSR entries (`fill` for isolated nodes)."""
+    out = np.full(csr.n, fill, dtype=values.dtype)
+    has = csr.degree > 0
+    if has.any():
+        out[has] = np.maximum.reduceat(values, csr.indptr[:-1][has])
+    return out
+
+
+def _segment_or(csr: CSRGraph, values: np.ndarray) -> np.ndarray:
+    """Per node, the bitwise OR of `values` over its CSR entries (0 for isolated nodes)."""
+    out = np.zeros(csr.n, dtype=np.int64)
+    has = csr.degree > 0
+    if has.any():
+        out[has] = np.bitwise_or.reduceat(values.astype(np.int64), csr.indptr[:-1][has])
+    return out
+
+
+def conflict_edges(csr: CSRGraph, colors: np.ndarray) -> int:
+    same = colors[csr.rows] == colors[csr.indices]
+    return int(same.sum()) // 2
+
+
+def check_coloring(csr: CSRGraph, colors: Sequence[Union[int, str]]) -> dict:
+    """Conflicting edges and colors used of a final coloring (color names or indices)."""
+    colors = np.asarray([COLORS.index(c) if isinstance(c, str) else c for c in colors])
+    return {"conflict_edges": conflict_edges(csr, colors), "colors_used": int(len(np.unique(colors)))}
+
+
+def _segment_min(csr: CSRGraph, values: np.ndarray, fill) -> np.ndarray:
+    return -_segment_max(csr, -values, -fill)
+
+
+def _choose(strategy: str, own: np.ndarray, counts: np.ndarray, firm: np.ndarray, k: int,
+            rng: np.random.Generator) -> np.ndarray:
+    """New colors for movers with colors `own`, neighbour color counts [m, k] and counts of the
+    neighbours that will not give way [m, k] (done ones, and for least_used also the higher
+    ranked ones): their colors are avoided first."""
+    other = np.arange(k)[None, :] != own[:, None]
+    noise = rng.random(counts.shape)
+    if strategy == "least_used":
+        return np.where(other, (counts.sum(1, keepdims=True) + 2) * firm + counts + noise, np.inf).argmin(1)
+    # free, luby, dsatur: a color no neighbour uses, else one only active neighbours use
+    free = other & (counts == 0)
+    movable = other & (firm == 0)
+    pick = np.where(movable.any(1), np.where(movable, noise, -1.0).argmax(1), (own + rng.integers(1, k, len(own))) % k)
+    return np.where(free.any(1), np.where(free, noise, -1.0).argmax(1), pick)
+
+
+def simulate(csr: CSRGraph, colors: Optional[Sequence[Union[int, str]]] = None, k: int = len(COLORS),
+             stable_rounds: int = STABLE_ROUNDS, max_rounds: int = MAX_ROUNDS, seed: Optional[int] = None,
+             messaging: str = "always", strategy: str = "random") -> dict:
+    """Run the protocol until every agent is done (or max_rounds). `colors` are the initial
+    colors (default: uniform random). Returns rounds, total messages, the final colors and per
+    round: conflicting edges, agents in conflict, color changes, active agents and messages."""
+    if messaging not in ("always", "changes"):
+        raise ValueError(f"unknown messaging {messaging!r}")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r}; choose from {STRATEGIES}")
+    if strategy != "random" and messaging != "changes":
+        raise ValueError(f"strategy {strategy!r} needs messaging='changes' (it keeps neighbours' state)")
+    rng = np.random.default_rng(seed)
+    if colors is None:
+        c = rng.integers(0, k, csr.n)
+    else:
+        c = np.asarray([COLORS.index(x) if isinstance(x, str) else x for x in colors], dtype=np.int64)
+    n, deg, ids = csr.n, csr.degree, np.arange(csr.n)
+    active = np.ones(n, dtype=bool)
+    stable = np.zeros(n, dtype=np.int64)
+    curves: Dict[str, List[int]] = {key: [] for key in ("conflict_edges", "in_conflict", "changes", "active", "messages")}
+    src, dst = csr.rows, csr.indices
+    announced = np.full(n, -1, dtype=c.dtype)         # color the neighbours last heard
+    announced_sat = np.full(n, -1, dtype=np.int64)    # dsatur: saturation they last heard
+    no_key = np.iinfo(np.int64).max
+    # finishing order of the non-random strategies: higher degree first, random tie-break
+    rank = deg * n + rng.permutation(n) if strategy != "random" else None
+    rounds = 0
+    while active.any() and rounds < max_rounds:
+        rounds += 1
+        # "always": what active neighbours send is forgotten after the round, but finished
+        # neighbours' colors are kept; "changes": every neighbour's last color stays known.
+        # Either way an active agent sees all its neighbours' colors
+        visible = active[src]
+        seen = visible & (c[dst] == c[src])
+        in_conflict = _segment_max(csr, seen.astype(np.int8), 0).astype(bool)
+        counts = None
+        if strategy != "random":
+            # per agent and color: how many visible neighbours use it
+            counts = np.bincount(src[visible] * k + c[dst[visible]], minlength=n * k).reshape(n, k)
+        sat = (counts > 0).sum(1) if strategy == "dsatur" else None
+
+        # messages of this round
+        if messaging == "always":
+            sending = active
+        else:
+            sending = active & (c != announced)
+            if strategy == "dsatur":
+                sending |= active & (sat != announced_sat)
+                announced_sat[sending] = sat[sending]
+            if strategy == "luby":
+                sending |= in_conflict            # a fresh priority every round
+            announced[sending] = c[sending]
+        messages = int(deg[sending].sum())
+
+        # who moves
+        if strategy == "luby":
+            # random priorities; an agent in conflict moves if it beats every neighbour in conflict,
+            # so the movers form an independent set
+            r = np.where(in_conflict, rng.random(n), -1.0)
+            rivals = _segment_max(csr, np.where(visible & in_conflict[dst], r[dst], -1.0), -1.0)
+            movers = in_conflict & (r > rivals)
+        elif strategy == "dsatur":
+            # the less saturated (then lower degree, then lower id) side of a conflict moves
+            key = sat * (int(deg.max()) + 1) * n + rank
+            rival = _segment_min(csr, np.where(seen, key[dst], no_key), no_key)
+            movers = in_conflict & (key < rival)
+        elif strategy == "random":
+            max_id = _segment_max(csr, np.where(seen, dst, -1), -1)
+            movers = in_conflict & (ids > max_id)
+        else:
+            # free, least_used: the lower ranked side of a conflict moves
+            rival = _segment_min(csr, np.where(seen, rank[dst], no_key), no_key)
+            movers = in_conflict & (rank < rival)
+        blocked = _segment_max(csr, (seen & ~active[dst]).astype(np.int8), 0).astype(bool)
+        movers |= blocked
+
+        # which color
+        m = np.flatnonzero(movers)
+        if strategy == "random":
+            c_new = (c[m] + rng.integers(1, k, len(m))) % k
+            # blocked agents avoid the colors of finished neighbours when they can
+            if blocked.any():
+                fixed = _segment_or(csr, np.where(active[dst], 0, 1 << c[dst]))[m]
+                free = (fixed[:, None] >> np.arange(k)) & 1 == 0
+                free &= np.arange(k) != c[m][:, None]
+                pick = np.where(free, rng.random((len(m), k)), -1.0).argmax(1)
+                c_new = np.where(blocked[m] & free.any(1), pick, c_new)
+        else:
+            firm = visible & ~active[dst]
+            if strategy == "least_used":
+                firm |= visible & (rank[dst] > rank[src])
+            firm_counts = np.bincount(src[firm] * k + c[dst[firm]], minlength=n * k).reshape(n, k)
+            c_new = _choose(strategy, c[m], counts[m], firm_counts[m], k, rng)
+        c[m] = c_new
+
+        stable[in_conflict] = 0
+        calm = active & ~in_conflict
+        stable[calm] += 1
+        finishing = active & (stable >= stable_rounds)
+        if strategy != "random":
+            # ... and not before its higher ranked neighbours with k or more neighbours, so those
+            # settle before everyone around them is fixed (fewer than k always leave a free color)
+            crowded = active[dst] & (deg[dst] >= k)
+            finishing &= rank > _segment_max(csr, np.where(crowded, rank[dst], -1), -1)
+        messages += int(deg[finishing].sum())   # the done announcement
+        curves["messages"].append(messages)
+        curves["active"].append(int(active.sum()))
+        curves["in_conflict"].append(int(in_conflict.sum()))
+        curves["changes"].append(int(movers.sum()))
+        active &= ~finishing
+        curves["conflict_edges"].append(conflict_edges(csr, c))
+    return {
+        "rounds": rounds,
+        "converged": not active.any(),
+        "messages": sum(curves["messages"]),
+        "conflict_edges": conflict_edges(csr, c),
+        "colors_used": int(len(np.unique(c))),
+        "colors": c,
+        "curves": curves,
+    }
+
+
+# ---------- graphs for the command line ----------
+def make_graph(kind: str, n: int, seed: int = 0) -> CSRGraph:
+    """cycle and grid are built in NumPy (any size); regular and powerlaw use networkx."""
+    if kind == "cycle":
+        i = np.arange(n)
+        return CSRGraph.from_edges(n, np.stack([i, (i + 1) % n], axis=1))
+    if kind == "grid":
+        side = int(round(n ** 0.5))
+        idx = np.arange(side * side).reshape(side, side)
+        edges = np.concatenate([np.stack([idx[:, :-1].ravel(), idx[:, 1:].ravel()], 1),
+                                np.stack([idx[:-1, :].ravel(), idx[1:, :].ravel()], 1)])
+        return CSRGraph.from_edges(side * side, edges)
+    import networkx as nx
+
+    if kind == "regular":
+        return CSRGraph.from_networkx(nx.random_regular_graph(3, n, seed=seed))
+    if kind == "powerlaw":
+        return CSRGraph.from_networkx(nx.barabasi_albert_graph(n, 2, seed=seed))
+    raise ValueError(f"unknown graph kind {kind!r}")
+
+
+# (strategy, messaging, stable rounds): the original protocol first
+VARIANTS = [
+    ("random", "always", 3),
+    ("random", "changes", 3),
+    ("free", "changes", 1),
+    ("least_used", "changes", 1),
+    ("luby", "changes", 1),
+    ("dsatur", "changes", 1),
+]
+
+
+def main():
+    sizes = [int(x) for x in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1_000, 10_000, 100_000]
+    kinds = sys.argv[2:] or ["cycle", "grid", "regular", "powerlaw"]
+    print(f"{'graph':<9} {'n':>8}  {'strategy':<10} {'messaging':<9} {'stable':>6} {'rounds':>6} "
+          f"{'messages':>10} {'msg/node':>8} {'conflicts':>9} {'colors':>6} {'seconds':>7}")
+    for kind in kinds:
+        for size in sizes:
+            csr = make_graph(kind, size)
+            for strategy, messaging, stable_rounds in VARIANTS:
+                t0 = time.perf_counter()
+                result = simulate(csr, seed=0, messaging=messaging, strategy=strategy, stable_rounds=stable_rounds)
+                rounds = f"{result['rounds']}{'' if result['converged'] else '+'}"
+                print(f"{kind:<9} {csr.n:>8}  {strategy:<10} {messaging:<9} {stable_rounds:>6} {rounds:>6} "
+                      f"{result['messages']:>10} {result['messages'] / csr.n:>8.1f} {result['conflict_edges']:>9} "
+                      f"{result['colors_used']:>6} {time.perf_counter() - t0:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,142 @@
 import asyncio
 import random
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Union
+
 import networkx as nx
 
 from mango import Agent, run_with_tcp, custom_topology, per_node
 
+from agent_based import StepBarrier
+from coloring_sim import STRATEGIES, CSRGraph, check_coloring, simulate
+from tree_barrier import FANOUT, TreeBarrierNode, tree_depth
+
 COLORS = ["red", "green", "blue", "yellow", "purple", "orange"]  # agent count will match this
 
+MODE = "rounds"        # "rounds": ColorAgent + RoundManager; "async": AsyncColorAgent, no global rounds
+BARRIER = "local"      # rounds mode: "local" (RoundManager, one process) or "tree" (tree_barrier.py)
+MESSAGING = "always"   # rounds mode: "always" (color to every neighbour each round) or "changes"
+STRATEGY = "random"    # rounds mode: "random", "free", "least_used", "luby" or "dsatur" (see ColorAgent)
+STABLE_ROUNDS = 3      # conflict-free rounds before an agent is done (1 is enough for the non-random strategies)
+ASYNC_RULE = "dsa"     # AsyncColorAgent rule: "dsa" (probabilistic) or "priority" (lower id wins)
+DSA_P = 0.5            # dsa: chance to act on a conflict, so neighbours rarely switch together
+DECIDE_DELAY_S = 0.01  # async agents decide this long after the first unprocessed update
+QUIET_S = 0.5          # async run is over when no agent has a conflict or sent anything for this long
+RUN_TIMEOUT_S = 60.0
+MAX_ROUNDS = 500       # rounds mode: stop there if agents never settle (e.g. random/changes on hubs)
+CHECK_WITH_SIM = True  # rounds mode: check the final coloring and replay the start in coloring_sim.py
+
 
 class RoundManager:
-    def __init__(self, agent_count: int):
+    def __init__(self, agent_count: int, timeout: Optional[float] = None):
         self.agent_count = agent_count
-        self.round_event = asyncio.Event()
-        self.round_done_event = asyncio.Event()
-        self._finished_this_round = 0
-        self._lock = asyncio.Lock()
-
-    async def wait_round_start(self):
-        """Agents call this at the start of every round."""
-        await self.round_event.wait()
-
-    async def agent_step_done(self):
-        """Agents call this at the end of their round logic."""
-        async with self._lock:
-            self._finished_this_round += 1
-            if self._finished_this_round == self.agent_count:
-                # Last agent to finish this round
-                self._finished_this_round = 0
-                self.round_event.clear()
-                self.round_done_event.set()
-
-    async def wait_round_end(self):
-        """Main loop waits for all agents to finish the round."""
-        await self.round_done_event.wait()
-        self.round_done_event.clear()
+        self.round = 0
+        self.retired: Set[int] = set()   # agents that reported done; left out of later rounds
+        self._round_started = asyncio.Condition()
+        # round-keyed barrier: late reports from an earlier round are rejected as stale
+        self.barrier = StepBarrier(timeout=timeout, name="rounds")
+
+    async def start_round(self, participants: Optional[Iterable[int]] = None):
+        """Main loop opens the next round for `participants` (default: every agent not yet done)."""
+        if participants is None:
+            participants = [i for i in range(self.agent_count) if i not in self.retired]
+        async with self._round_started:
+            self.round += 1
+            self.barrier.open(self.round, participants)
+            self._round_started.notify_all()
+
+    async def wait_round_start(self, last_round: int = 0) -> int:
+        """Agents call this at the start of every round; returns the round number."""
+        async with self._round_started:
+            await self._round_started.wait_for(lambda: self.round > last_round)
+            return self.round
+
+    async def agent_step_done(self, idx: int, round_no: int, done: bool = False):
+        """Agents call this at the end of their round logic (done agents leave the next rounds)."""
+        if done:
+            self.retired.add(idx)
+        self.barrier.arrive(round_no, idx)
+
+    def handle_message(self, content, meta) -> bool:
+        """RoundManager lives in-process and has no messages of its own."""
+        return False
+
+    async def wait_round_end(self) -> bool:
+        """Main loop waits for all participants to finish the round (False on timeout)."""
+        return await self.barrier.wait()
 
 
 class ColorAgent(Agent):
-    def __init__(self, idx: int, round_manager: RoundManager):
+    """Round-based coloring agent.
+
+    messaging="always": every round the agent sends its color to every neighbour, decides once
+    it has every neighbour's color of that round, and forgets them at the end of the round
+    (the original protocol). Neighbours that announced done no longer send, so their last
+    color is kept.
+    messaging="changes": the agent keeps a persistent table of neighbour colors and only sends
+    when its color changed since it last sent (the first round sends to everyone); a quiet
+    neighbour still has the color in the table.
+    With either messaging a finishing agent announces done once, and a conflict with a done
+    neighbour is always resolved by this agent (done agents no longer move), preferring a color
+    no done neighbour holds. Messages sent per round are in sent_per_round.
+
+    strategy decides who moves in a conflict and to which color:
+      "random"      the largest id among the conflicting agents moves to a random other color
+      "free"        the lower ranked side moves, to a color no neighbour uses if there is one
+      "least_used"  as "free", but to the color fewest neighbours use, counting first those
+                    that will not give way (done or higher ranked)
+      "luby"        agents in conflict draw a random priority each round and send it; in the next
+                    round only a local maximum of those draws moves (an independent set), to a
+                    free color
+      "dsatur"      as "free", but agents seeing fewer distinct neighbour colors (saturation,
+                    sent when it changes) move first
+    The rank is (degree, random tie-break), sent along with the color. Except for "random",
+    an agent only finishes when no active neighbour with len(COLORS) or more neighbours
+    outranks it: such agents can run out of free colors, so they settle first. These
+    strategies need messaging="changes" (they rely on the persistent table and done flags);
+    coloring_sim.py compares their rounds and messages on large graphs.
+    """
+    def __init__(self, idx: int, round_manager: Union[RoundManager, TreeBarrierNode], messaging: str = MESSAGING,
+                 strategy: str = STRATEGY, stable_rounds: int = STABLE_ROUNDS):
         super().__init__()
+        if messaging not in ("always", "changes"):
+            raise ValueError(f"unknown messaging {messaging!r}")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}; choose from {STRATEGIES}")
+        if strategy != "random" and messaging != "changes":
+            raise ValueError(f"strategy {strategy!r} needs messaging='changes'")
         self.idx = idx
         self.color = random.choice(COLORS)
+        self.initial_color = self.color
         self.round_manager = round_manager
-        self.neighbor_colors = {}  # sender_addr -> {"id": int, "color": str}
+        self.messaging = messaging
+        self.strategy = strategy
+        self.stable_target = stable_rounds
+        self.neighbor_colors = {}  # neighbour id -> {"id": int, "color": str, "done": bool, ...}
         self.stable_rounds = 0
+        self.tie = random.random()                # rank tie-break
+        self.priority = -1.0                      # luby: this round's draw (-1 = not in conflict)
+        self._last_priority, self._last_priority_round = -1.0, 0
+        self._announced_sat: Optional[int] = None
+        self.last_round = 0
         self.done = False
+        self.sent_per_round: Dict[int, int] = {}
+        self._announced: Optional[str] = None     # color the neighbours last heard from us
+        self._heard = asyncio.Event()             # set on every color message
+
+    async def _send_color(self, **extra):
+        content = {"id": self.idx, "color": self.color, "round": self.last_round, **extra}
+        if self.strategy != "random":
+            content.update(deg=len(self.neighbors()), tie=self.tie)
+            if self.strategy == "dsatur":
+                content["sat"] = self._announced_sat = self.saturation()
+            if self.strategy == "luby":
+                content["r"] = self.priority
+        for neighbor in self.neighbors():
+            await self.send_message(content, neighbor)
+            self.sent_per_round[self.last_round] = self.sent_per_round.get(self.last_round, 0) + 1
+        self._announced = self.color
 
     def on_ready(self):
         print(f"[{self.idx}] ready with initial color {self.color}")
@@ -51,72 +144,336 @@ class ColorAgent(Agent):
 
     async def protocol_loop(self):
         while not self.done:
-            # 1 - wait for round to start
-            await self.round_manager.wait_round_start()
+            # 1 - wait for the next round to start
+            self.last_round = await self.round_manager.wait_round_start(self.last_round)
 
-            # 2 - broadcast my color to neighbors
-            for neighbor in self.neighbors():
-                await self.send_message(
-                    {"id": self.idx, "color": self.color},
-                    neighbor,
-                )
+            # 2 - broadcast my color to neighbors (only if it changed, with messaging="changes")
+            conflicts = self.conflicts()
+            self._last_priority, self._last_priority_round = self.priority, self.last_round - 1
+            self.priority = random.random() if self.strategy == "luby" and conflicts else -1.0
+            if (self.messaging == "always" or self.color != self._announced
+                    or (self.strategy == "dsatur" and self.saturation() != self._announced_sat)
+                    or self.priority >= 0):
+                await self._send_color()
 
             # 3 - check conflicts based on neighbor_colors
-            conflicts = [
-                info for info in self.neighbor_colors.values()
-                if info["color"] == self.color
-            ]
-
+            if self.messaging == "always":
+                await self._wait_for_neighbours()
+            conflicts = self.conflicts()
             if conflicts:
                 conflict_ids = [info["id"] for info in conflicts]
-                max_id = max(conflict_ids + [self.idx])
-
-                if self.idx == max_id:
+                if self._should_move(conflicts):
                     old = self.color
-                    options = [c for c in COLORS if c != self.color]
-                    self.color = random.choice(options)
+                    self.color = self._choose_color(any(info.get("done") for info in conflicts))
                     print(
                         f"[{self.idx}] conflict with {conflict_ids}, "
                         f"changing {old} -> {self.color}"
                     )
+                    if self.messaging == "changes":
+                        # publish within this round, so the neighbours decide on it next round
+                        await self._send_color()
                 else:
-                    print(
-                        f"[{self.idx}] conflict but keeping {self.color}, "
-                        f"smaller id than {max_id}"
-                    )
+                    print(f"[{self.idx}] conflict with {conflict_ids} but keeping {self.color}")
 
                 self.stable_rounds = 0
             else:
                 self.stable_rounds += 1
                 print(f"[{self.idx}] no conflict, stable_rounds={self.stable_rounds}")
-                if self.stable_rounds >= 3:
+                if self.stable_rounds >= self.stable_target and self._may_finish():
                     self.done = True
                     print(f"[{self.idx}] finished with final color {self.color}")
+                    await self._send_color(done=True)
 
             # 4 - tell round manager that I am done with this round
-            await self.round_manager.agent_step_done()
+            await self.round_manager.agent_step_done(self.idx, self.last_round, self.done)
+
+            # 5 - clear for next round (the table persists with messaging="changes"); done
+            # neighbours have stopped sending, so their colors stay
+            if self.messaging == "always":
+                self.neighbor_colors = {i: info for i, info in self.neighbor_colors.items() if info["done"]}
 
-            # 5 - clear for next round
-            self.neighbor_colors = {}
+    async def _wait_for_neighbours(self):
+        """messaging="always": until every neighbour's color of this round (or its done
+        announcement) is in; neighbours that are not done send every round."""
+        while sum(info["done"] or info["round"] == self.last_round
+                  for info in self.neighbor_colors.values()) < len(self.neighbors()):
+            self._heard.clear()
+            await self._heard.wait()
+
+    # ----- strategies -----
+    def conflicts(self) -> List[dict]:
+        return [info for info in self.neighbor_colors.values() if info["color"] == self.color]
+
+    def saturation(self) -> int:
+        """Distinct colors among the neighbours."""
+        return len({info["color"] for info in self.neighbor_colors.values()})
+
+    def _rank(self, info: Optional[dict] = None) -> tuple:
+        if info is None:
+            return len(self.neighbors()), self.tie
+        return info.get("deg", 0), info.get("tie", 0.0)
+
+    def _should_move(self, conflicts: List[dict]) -> bool:
+        if any(info.get("done") for info in conflicts):
+            return True  # done neighbours will not move
+        if self.strategy == "random":
+            return self.idx > max(info["id"] for info in conflicts)
+        if self.strategy == "luby":
+            # compare last round's draws, which have had a full round to arrive
+            mine = self._last_priority if self._last_priority_round == self.last_round - 1 else -1.0
+            rivals = [info.get("r", -1.0) for info in self.neighbor_colors.values()
+                      if not info.get("done") and info.get("round") == self.last_round - 1]
+            return mine > max(rivals, default=-1.0)
+        if self.strategy == "dsatur":
+            mine = (self.saturation(), *self._rank())
+            return all(mine < (info.get("sat", 0), *self._rank(info)) for info in conflicts)
+        return all(self._rank() < self._rank(info) for info in conflicts)
+
+    def _choose_color(self, blocked_by_done: bool) -> str:
+        options = [c for c in COLORS if c != self.color]
+        # done neighbours will not move; avoid their colors if possible
+        fixed = {info["color"] for info in self.neighbor_colors.values() if info.get("done")}
+        if self.strategy == "random":
+            if blocked_by_done:
+                options = [c for c in options if c not in fixed] or options
+            return random.choice(options)
+        used = Counter(info["color"] for info in self.neighbor_colors.values())
+        if self.strategy == "least_used":
+            # first count the neighbours that will not give way (done or ranked higher)
+            firm = Counter(info["color"] for info in self.neighbor_colors.values()
+                           if info.get("done") or self._rank(info) > self._rank())
+            return min(options, key=lambda c: (firm[c], used[c] + random.random()))
+        free = [c for c in options if not used[c]]
+        return random.choice(free or [c for c in options if c not in fixed] or options)
+
+    def _may_finish(self) -> bool:
+        if self.messaging == "changes" and len(self.neighbor_colors) < len(self.neighbors()):
+            return False  # not heard from everyone yet
+        if self.strategy == "random":
+            return True
+        return not any(not info.get("done") and info.get("deg", 0) >= len(COLORS) and self._rank(info) > self._rank()
+                       for info in self.neighbor_colors.values())
 
     def handle_message(self, content, meta):
-        sender_addr = meta.get("sender_addr") or meta.get("sender")
-        if not sender_addr:
+        if self.round_manager.handle_message(content, meta):
+            return  # barrier traffic
+        # keyed by agent id: sender_addr is the container's address, shared by all its agents
+        sender = content.get("id")
+        if sender is None:
             return
-        self.neighbor_colors[sender_addr] = {
-            "id": content["id"],
-            "color": content["color"],
-        }
+        known = self.neighbor_colors.get(sender)
+        if known is not None and (known["done"] or content["round"] < known["round"]):
+            return  # overtaken by a newer message (done is the last one an agent sends)
+        self.neighbor_colors[sender] = {**content, "done": content.get("done", False)}
+        self._heard.set()
         # Optional debug print:
         # print(f"[{self.idx}] heard {content['color']} from id={content['id']}")
 
 
+def messages_per_round(agents) -> List[int]:
+    """Color messages sent in each round, summed over agents."""
+    rounds = max((r for a in agents for r in a.sent_per_round), default=0)
+    return [sum(a.sent_per_round.get(r, 0) for a in agents) for r in range(1, rounds + 1)]
+
+
+def final_conflicts(graph: nx.Graph, agents) -> int:
+    """Conflicting edges of the agents' colors, judged on the graph itself."""
+    return check_coloring(CSRGraph.from_networkx(graph), [a.color for a in agents])["conflict_edges"]
+
+
+def print_outcome(agents, conflicts: int, stopped: str):
+    """Success line only when every agent finished and no edge conflicts."""
+    if not all(a.done for a in agents):
+        print(f"\n{stopped}, {sum(not a.done for a in agents)} agent(s) still running:")
+    elif conflicts:
+        print(f"\nAll agents finished, but {conflicts} edge(s) still conflict:")
+    else:
+        print("\nAll agents reached stable colors:")
+
+
+def check_with_sim(graph: nx.Graph, agents, rounds: int):
+    """Compare an agent run with the vectorized simulator started from the same colors."""
+    csr = CSRGraph.from_networkx(graph)
+    sim = simulate(csr, [a.initial_color for a in agents], seed=0, messaging=agents[0].messaging,
+                   strategy=agents[0].strategy, stable_rounds=agents[0].stable_target)
+    print(f"Check: agents {check_coloring(csr, [a.color for a in agents])} after {rounds} rounds; "
+          f"simulator {sim['conflict_edges']} conflict edges after {sim['rounds']} rounds")
+
+
+class AsyncColorAgent(Agent):
+    """Barrier-free coloring: no rounds, every agent reacts to neighbour colors as they arrive.
+
+    The agent keeps the latest color of every neighbour (agent view, versioned per sender so
+    reordered messages cannot roll it back) and re-decides shortly after an update:
+      "dsa"       on a conflict, with probability DSA_P move to the color that fewest neighbours
+                  use (DSA-B); the coin flip keeps neighbours from switching in lockstep
+      "priority"  ABT-style: an agent only yields to conflicting neighbours with a lower id and
+                  moves to a color no lower-id neighbour holds (preferring one no neighbour holds);
+                  the lowest ids settle first, so the run converges like a distributed greedy
+    It only sends its color when it changes, so activity stays local to conflicting regions.
+    """
+    def __init__(self, idx: int, rule: str = ASYNC_RULE, p: float = DSA_P):
+        super().__init__()
+        if rule not in ("dsa", "priority"):
+            raise ValueError(f"unknown rule {rule!r}")
+        self.idx = idx
+        self.rule = rule
+        self.p = p
+        self.color = random.choice(COLORS)
+        self.version = 0
+        self.neighbor_colors = {}  # neighbour id -> {"id": int, "color": str, "version": int}
+        self._decide_task: Optional[asyncio.Task] = None
+        self.last_activity = 0.0
+        self.changes = 0
+        self.sent = 0
+
+    @property
+    def conflicts(self):
+        return [info["id"] for info in self.neighbor_colors.values() if info["color"] == self.color]
+
+    @property
+    def stable(self) -> bool:
+        return not self.conflicts and (self._decide_task is None or self._decide_task.done())
+
+    def on_ready(self):
+        print(f"[{self.idx}] ready with initial color {self.color}")
+        self.last_activity = time.monotonic()
+        asyncio.create_task(self._broadcast())
+
+    async def _broadcast(self):
+        content = {"id": self.idx, "color": self.color, "version": self.version}
+        for neighbor in self.neighbors():
+            await self.send_message(content, neighbor)
+            self.sent += 1
+
+    def handle_message(self, content, meta):
+        # keyed by agent id: sender_addr is the container's address, shared by all its agents
+        sender = content["id"]
+        known = self.neighbor_colors.get(sender)
+        if known is not None and known["version"] >= content["version"]:
+            return  # stale
+        self.neighbor_colors[sender] = {"id": sender, "color": content["color"], "version": content["version"]}
+        if self._decide_task is None or self._decide_task.done():
+            self._decide_task = asyncio.create_task(self._decide())
+
+    async def _decide(self):
+        # let a burst of updates land before deciding on all of them at once
+        await asyncio.sleep(DECIDE_DELAY_S)
+        conflicts = self.conflicts
+        if not conflicts:
+            return
+        if self.rule == "dsa":
+            if random.random() >= self.p:
+                # retry later in case nothing else wakes us up
+                self._decide_task = asyncio.create_task(self._decide())
+                return
+            used = [info["color"] for info in self.neighbor_colors.values()]
+            fewest = min(used.count(c) for c in COLORS if c != self.color)
+            new = random.choice([c for c in COLORS if c != self.color and used.count(c) == fewest])
+        else:
+            if min(conflicts) > self.idx:
+                return  # the conflicting neighbours yield to me
+            higher = {info["color"] for info in self.neighbor_colors.values() if info["id"] < self.idx}
+            used = {info["color"] for info in self.neighbor_colors.values()}
+            options = [c for c in COLORS if c not in used] or [c for c in COLORS if c not in higher]
+            if not options:
+                print(f"[{self.idx}] no color left next to lower ids, keeping {self.color}")
+                return
+            new = random.choice(options)
+        print(f"[{self.idx}] conflict with {conflicts}, changing {self.color} -> {new}")
+        self.color = new
+        self.version += 1
+        self.changes += 1
+        self.last_activity = time.monotonic()
+        await self._broadcast()
+
+
+async def run_async(graph: nx.Graph, rule: str = ASYNC_RULE) -> dict:
+    """Color `graph` with AsyncColorAgents; returns time to quiescence and message counts."""
+    topology = custom_topology(graph)
+    for idx, node in enumerate(per_node(topology)):
+        node.add(AsyncColorAgent(idx, rule))
+    agents = topology.agents
+
+    async with run_with_tcp(1, *agents):
+        print(f"Starting asynchronous color negotiation ({rule})...")
+        start = time.monotonic()
+        converged = False
+        while time.monotonic() - start < RUN_TIMEOUT_S:
+            await asyncio.sleep(QUIET_S / 5)
+            # no global rounds: this only watches for quiescence
+            now = time.monotonic()
+            if all(a.stable for a in agents) and now - max(a.last_activity for a in agents) >= QUIET_S:
+                converged = True
+                break
+        elapsed = max(0.0, max(a.last_activity for a in agents) - start)
+        # judge the coloring on the graph itself, not on what the agents believe
+        conflicts = final_conflicts(graph, agents)
+        status = "timed out" if not converged else "converged" if conflicts == 0 else "went quiet with conflicts"
+        converged = converged and conflicts == 0
+
+        print(f"\nAsync run {status}: last change after {elapsed:.3f}s, "
+              f"{sum(a.changes for a in agents)} color changes, {sum(a.sent for a in agents)} messages, "
+              f"{conflicts} conflict edge(s)")
+        for agent in agents:
+            print(f"Agent {agent.idx} at {agent.addr} -> {agent.color}")
+        return {
+            "converged": converged,
+            "seconds": elapsed,
+            "changes": sum(a.changes for a in agents),
+            "messages": sum(a.sent for a in agents),
+            "conflicts": conflicts,
+        }
+
+
+async def run_tree(graph: nx.Graph, fanout: int = FANOUT) -> dict:
+    """Synchronous rounds over the combining-tree barrier: no RoundManager, no main loop.
+    Agent i (in per_node order) is tree node i; agent 0's node starts and finishes the run."""
+    topology = custom_topology(graph)
+    count = graph.number_of_nodes()
+    nodes = [TreeBarrierNode(i, count, fanout) for i in range(count)]
+    for idx, node in enumerate(per_node(topology)):
+        agent = ColorAgent(idx, nodes[idx], MESSAGING, STRATEGY, STABLE_ROUNDS)
+        nodes[idx].bind(agent)
+        node.add(agent)
+    agents = topology.agents
+
+    async with run_with_tcp(1, *agents):
+        addrs = [a.addr for a in agents]
+        for node in nodes:
+            node.wire(addrs)
+        print(f"Starting decentralized color negotiation (tree barrier, fanout {fanout}, "
+              f"depth {tree_depth(count, fanout)})...")
+        nodes[0].start()
+        try:
+            await asyncio.wait_for(nodes[0].finished.wait(), timeout=RUN_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            pass
+        conflicts = final_conflicts(graph, agents)
+        print_outcome(agents, conflicts, f"Timeout after {RUN_TIMEOUT_S}s")
+        print(f"Rounds: {nodes[0].round}, barrier messages: {sum(n.sent for n in nodes)}, "
+              f"root release latency: {nodes[0].histogram.summary()}")
+        print(f"Color messages per round ({MESSAGING}, {STRATEGY}): {messages_per_round(agents)}")
+        for agent in agents:
+            print(f"Agent {agent.idx} at {agent.addr} -> {agent.color}")
+        if CHECK_WITH_SIM:
+            check_with_sim(graph, agents, nodes[0].round)
+        return {"rounds": nodes[0].round, "barrier_messages": sum(n.sent for n in nodes),
+                "messages_per_round": messages_per_round(agents), "conflicts": conflicts}
+
+
 async def main():
     """a ring of agents that repeatedly exchange colors, resolve conflicts with neighbors, and stop once each agent stabilizes on a unique color. """
     agent_count = len(COLORS)
 
     # Ring topology of size = number of colors
     graph = nx.cycle_graph(agent_count)
+    if MODE == "async":
+        await run_async(graph)
+        return
+    if BARRIER == "tree":
+        await run_tree(graph)
+        return
     topology = custom_topology(graph)
 
     round_manager = RoundManager(agent_count)
@@ -124,26 +481,30 @@ async def main():
     # Attach one agent per node
     idx = 0
     for node in per_node(topology):
-        node.add(ColorAgent(idx, round_manager))
+        node.add(ColorAgent(idx, round_manager, MESSAGING, STRATEGY, STABLE_ROUNDS))
         idx += 1
 
     async with run_with_tcp(1, *topology.agents):
         print("Starting decentralized color negotiation...")
 
-        while True:
-            # Start one round
-            round_manager.round_event.set()
+        while round_manager.round < MAX_ROUNDS:
+            # Start one round for every agent that is still running
+            await round_manager.start_round()
 
-            # Wait until all agents finish this round
+            # Wait until all of them finish this round
             await round_manager.wait_round_end()
 
             # Check if everyone is done
             if all(agent.done for agent in topology.agents):
                 break
 
-        print("\nAll agents reached stable colors:")
+        print_outcome(topology.agents, final_conflicts(graph, topology.agents), f"Stopped after {MAX_ROUNDS} rounds")
+        print(f"Rounds: {round_manager.round}, barrier latency: {round_manager.barrier.histogram.summary()}")
+        print(f"Color messages per round ({MESSAGING}, {STRATEGY}): {messages_per_round(topology.agents)}")
         for agent in topology.agents:
             print(f"Agent {agent.idx} at {agent.addr} -> {agent.color}")
+        if CHECK_WITH_SIM:
+            check_with_sim(graph, topology.agents, round_manager.round)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,139 @@
+# tree_barrier.py
+# Combining-tree round barrier for agents that may live in different mango containers or
+# processes (everything goes through messages, nothing is shared in memory).
+# Agents are numbered 0..N-1 and arranged as a FANOUT-ary tree over that order: agent i
+# reports to agent (i-1)//FANOUT, its group leader. A leader waits for its own agent and one
+# TREE_ARRIVE from each child subtree, then sends a single TREE_ARRIVE upward. When the root
+# (agent 0) has heard from everyone it releases the round, and TREE_RELEASE fans out down the
+# tree. A round costs 2(N-1) messages, no node handles more than FANOUT+1 of them, and the
+# critical path is 2*log_FANOUT(N) hops instead of N agents queueing on one lock.
+# Every TREE_ARRIVE also says whether its whole subtree is finished, so the root knows when
+# to stop without a central observer; the final release carries finish=True to every node.
+#
+# Usage (same interface as RoundManager, so ColorAgent works with either):
+#   nodes = [TreeBarrierNode(i, n) for i in range(n)]       # or only the local ones
+#   agent = ColorAgent(i, nodes[i]); nodes[i].bind(agent)
+#   ... once every agent has its address (any container):
+#   nodes[i].wire(addrs)                                     # addrs[j] = address of agent j
+#   nodes[0].start()                                         # in the process hosting agent 0
+#   await nodes[i].finished.wait()
+# The agent forwards its messages to node.handle_message(content, meta) first.
+
+import asyncio
+import time
+from typing import List, Optional, Sequence
+
+from agent_based import LatencyHistogram, StepBarrier
+
+FANOUT = 16
+
+
+class TreeBarrierNode:
+    def __init__(self, index: int, count: int, fanout: int = FANOUT):
+        self.index = index
+        self.count = count
+        self.fanout = max(2, fanout)
+        self.parent: Optional[int] = (index - 1) // self.fanout if index > 0 else None
+        first = index * self.fanout + 1
+        self.children: List[int] = list(range(first, min(count, first + self.fanout)))
+        self.agent = None
+        self.addrs: Optional[Sequence] = None
+        self.round = -1                       # last released round; round r+1 runs after release r
+        self.barrier = StepBarrier(name=f"tree-{index}")   # own agent + child subtrees, per round
+        self.finished = asyncio.Event()
+        self.retired = False                  # our agent is done; keep arriving on its behalf
+        self.histogram = LatencyHistogram()   # own arrival -> release of that round
+        self.sent = 0
+        self._subtree_done = True
+        self._arrived_at = 0.0
+        self._released = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        d, i = 0, self.index
+        while i > 0:
+            i = (i - 1) // self.fanout
+            d += 1
+        return d
+
+    def bind(self, agent):
+        """The agent whose mailbox carries this node's messages."""
+        self.agent = agent
+
+    def wire(self, addrs: Sequence):
+        """Addresses of all `count` agents, indexed like the tree."""
+        if len(addrs) != self.count:
+            raise ValueError(f"expected {self.count} addresses, got {len(addrs)}")
+        self.addrs = addrs
+
+    def _send(self, content, index: int):
+        self.agent.schedule_instant_message(content, self.addrs[index])
+        self.sent += 1
+
+    # ----- RoundManager interface -----
+    def start(self):
+        """Root only: release round 0, which opens round 1 everywhere."""
+        if self.parent is not None:
+            raise RuntimeError("only the root node starts the barrier")
+        self._release(0, False)
+
+    async def wait_round_start(self, last_round: int = 0) -> int:
+        while self.round < last_round and not self.finished.is_set():
+            await self._released.wait()
+        return self.round + 1
+
+    async def agent_step_done(self, idx: int, round_no: int, done: bool = False):
+        self.arrive(round_no, done)
+
+    def handle_message(self, content, meta) -> bool:
+        """Consume barrier messages; returns False for anything else."""
+        t = content.get("type") if isinstance(content, dict) else None
+        if t == "TREE_ARRIVE":
+            self._contribute(content["round"], content["child"], content["done"])
+        elif t == "TREE_RELEASE":
+            self._release(content["round"], content["finish"])
+        else:
+            return False
+        return True
+
+    # ----- tree -----
+    def arrive(self, round_no: int, done: bool = False):
+        self._arrived_at = time.perf_counter()
+        self.retired = self.retired or done
+        self._contribute(round_no, self.index, done)
+
+    def _contribute(self, round_no: int, who: int, done: bool):
+        if not self.barrier.arrive(round_no, who):
+            return
+        self._subtree_done = self._subtree_done and done
+        if not self.barrier.complete:
+            return
+        if self.parent is None:
+            self._release(round_no, self._subtree_done)
+        else:
+            self._send({"type": "TREE_ARRIVE", "round": round_no, "child": self.index,
+                        "done": self._subtree_done}, self.parent)
+
+    def _release(self, round_no: int, finish: bool):
+        if round_no <= self.round:
+            return
+        if round_no > 0:
+            self.histogram.record(time.perf_counter() - self._arrived_at)
+        self.round = round_no
+        if not finish:
+            # open the next round before anyone below can arrive for it
+            self.barrier.open(round_no + 1, [self.index, *self.children])
+            self._subtree_done = True
+        for child in self.children:
+            self._send({"type": "TREE_RELEASE", "round": round_no, "finish": finish}, child)
+        if finish:
+            self.finished.set()
+        released, self._released = self._released, asyncio.Event()
+        released.set()
+        if self.retired and not finish:
+            self.arrive(round_no + 1, True)
+
+
+def tree_depth(count: int, fanout: int = FANOUT) -> int:
+    """Hops from the deepest agent to the root."""
+    return TreeBarrierNode(count - 1, count, fanout).depth if count > 0 else 0
@@ -0,0 +1,150 @@
+# batch_service.py
+# Many independent n-Queens instances in one process, sharing a single model backend.
+# Each instance is its own Coordinator + QueenAgent star (coordinator.py: delta protocol,
+# ACK barrier).
+# All coordinators submit proposals to one ModelService, which micro-batches them with
+# round-robin fairness. At the end the script prints per-instance time-to-solution and
+# the aggregate throughput in boards solved per minute.
+#
+# Requirements:
+#   pip install mango-agents
+#   For BACKEND = "llm": the same setup as tiny_solution.py (Ollama + tinyllama)
+#
+# Run:
+#   python batch_service.py
+
+import asyncio
+import json
+import statistics
+import time
+from typing import Callable, List, Optional
+
+import mango
+
+from board_protocol import QueenAgent
+from coordinator import StepCoordinator
+from model_service import MinConflictsBatchBackend, ModelService, ProposerBatchBackend, QueuedProposer
+from proposers import LLMProposer, Proposer
+
+# ================= Config =================
+INSTANCES = 200              # independent boards solved concurrently
+SIZES = [8, 12, 16, 24, 32]  # n cycles over these per instance
+SEED = 0
+BACKEND = "minconf"          # "minconf" (classical) or "llm" (TinyLlama via Ollama)
+MOVES_PER_STEP = 4           # classical backend: repair moves per outer step
+MAX_BATCH = 64               # requests per micro-batch
+BATCH_WINDOW_S = 0.005       # time the dispatcher waits for a batch to fill
+OUTER_STEPS = 500            # per-instance step cap
+ACK_TIMEOUT_S = 5.0
+ACK_RETRIES = 3
+RUN_TIMEOUT_S = 600
+REPORT_PATH = "batch_report.json"   # None to skip
+
+
+# ================= Mango agents =================
+class BatchCoordinator(StepCoordinator):
+    """Quiet coordinator that records its own timings and reports when it is done."""
+    verbose = False
+
+    def __init__(self, instance: int, n: int, proposer: Proposer, on_done: Callable[["BatchCoordinator"], None]):
+        super().__init__(n, proposer, OUTER_STEPS, ack_timeout=ACK_TIMEOUT_S, ack_retries=ACK_RETRIES,
+                         halt_stop=None, name=f"acks-{instance}")
+        self.instance = instance
+        self.on_done = on_done
+        self.t_start: Optional[float] = None
+        self.t_done: Optional[float] = None
+
+    def on_start(self):
+        self.t_start = time.perf_counter()
+
+    async def finish(self):
+        self.t_done = time.perf_counter()
+        await self.proposer.close()
+        self.on_done(self)
+
+    @property
+    def solved(self) -> bool:
+        return self.t_done is not None and self.index.total == 0
+
+
+# ================= Runtime =================
+def make_backend(backend: str):
+    if backend == "minconf":
+        return MinConflictsBatchBackend(seed=SEED, moves_per_step=MOVES_PER_STEP)
+    if backend == "llm":
+        from llm_client import TinyLlamaClient
+        return ProposerBatchBackend(LLMProposer(TinyLlamaClient()))
+    raise ValueError(f"unknown backend {backend!r}")
+
+
+def report(coords: List[BatchCoordinator], service: ModelService, wall_s: float) -> dict:
+    rows = []
+    for c in coords:
+        tts = (c.t_done - c.t_start) if c.t_done is not None and c.t_start is not None else None
+        rows.append({"instance": c.instance, "n": c.n, "solved": c.solved, "steps": c.steps,
+                     "errors": c.errors, "time_to_solution_s": tts})
+    solved = [r for r in rows if r["solved"]]
+    times = sorted(r["time_to_solution_s"] for r in solved)
+    summary = {
+        "instances": len(rows),
+        "solved": len(solved),
+        "wall_s": wall_s,
+        "boards_per_minute": 60.0 * len(solved) / wall_s if wall_s > 0 else 0.0,
+        "tts_median_s": statistics.median(times) if times else None,
+        "tts_p95_s": times[int(0.95 * (len(times) - 1))] if times else None,
+        "service": service.stats(),
+    }
+    for r in rows:
+        tts = f"{r['time_to_solution_s']:.3f}s" if r["time_to_solution_s"] is not None else "-"
+        print(f"[Batch] #{r['instance']:4d} n={r['n']:3d} solved={r['solved']!s:5} steps={r['steps']:4d} tts={tts}")
+    print(f"[Batch] {summary}")
+    return {"summary": summary, "instances": rows}
+
+
+async def main():
+    service = ModelService(make_backend(BACKEND), max_batch=MAX_BATCH, window_s=BATCH_WINDOW_S)
+    coords: List[BatchCoordinator] = []
+    agents = []
+    all_done = asyncio.Event()
+    finished = []
+
+    def on_done(coord: BatchCoordinator):
+        finished.append(coord)
+        if len(finished) == len(coords):
+            all_done.set()
+
+    with mango.create_topology() as topo:
+        for i in range(INSTANCES):
+            n = SIZES[i % len(SIZES)]
+            coord = BatchCoordinator(i, n, QueuedProposer(service, i), on_done)
+            queens = [QueenAgent(c) for c in range(n)]
+            node_c = topo.add_node(coord)
+            for q in queens:
+                topo.add_edge(node_c, topo.add_node(q))
+            coords.append(coord)
+            agents.append(coord)
+            agents.extend(queens)
+
+    dispatcher = None
+    t0 = time.perf_counter()
+    try:
+        async with mango.run_with_tcp(1, *agents):
+            dispatcher = asyncio.create_task(service.run())
+            try:
+                await asyncio.wait_for(all_done.wait(), timeout=RUN_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                print(f"[Batch] timeout: {len(finished)}/{len(coords)} instances finished")
+    finally:
+        wall = time.perf_counter() - t0
+        await service.stop()
+        if dispatcher is not None:
+            dispatcher.cancel()
+    result = report(coords, service, wall)
+    if REPORT_PATH:
+        with open(REPORT_PATH, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[Batch] report written to {REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
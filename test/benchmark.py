@@ -0,0 +1,273 @@
+# benchmark.py
+# Reproducible benchmark of the n-Queens Coordinator variants.
+# Runs every variant (tiny_solution.py, solution_gemma.py, main.py, torch_trm.py) over a
+# grid of board sizes under a fixed seed. LLM variants talk to a local stand-in Ollama
+# server (standin_ollama.py) instead of a real model, so runs are deterministic and only
+# the agent/protocol/client hot loop is measured. Each (variant, n, repeat) runs in its
+# own subprocess so peak RSS is per run.
+#
+# Recorded per run: solved, time-to-solution, outer steps, per-step model latency
+# (mean/p50/p95/max), messages and bytes sent by all agents, peak RSS (not on Windows).
+#
+# Requirements:
+#   pip install mango-agents aiohttp
+#   For the "trm" variant: torch
+#
+# Run:
+#   python benchmark.py                      # full grid -> bench_results.json / .csv
+#   python benchmark.py tiny main            # only some variants
+# Exits non-zero and lists the failures if any run ended with status "error".
+
+import asyncio
+import csv
+import importlib.util
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource          # POSIX only; on Windows the peak RSS column is left out
+except ImportError:
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+# ================= Config =================
+VARIANTS = ["tiny", "gemma", "main", "trm"]
+N_VALUES = [8, 16, 32, 64]
+SEED = 0
+REPEATS = 1                  # runs per (variant, n); seeds SEED, SEED+1, ...
+OUTER_STEPS = 256            # step cap applied to every variant so they are comparable
+STANDIN_LATENCY_S = 0.02     # simulated model latency per request
+STANDIN_MOVES = 1            # repair swaps the stand-in model makes per request
+RUN_TIMEOUT_S = 300          # per run
+RESULTS_JSON = "bench_results.json"
+RESULTS_CSV = "bench_results.csv"
+VERBOSE = False              # show the variants' own prints
+
+VARIANT_FILES = {
+    "tiny": "tiny_solution.py",
+    "gemma": "solution_gemma.py",
+    "main": "main.py",
+    "trm": os.path.join("other_implementations", "torch_trm.py"),
+}
+CSV_FIELDS = ["variant", "n", "seed", "status", "solved", "time_to_solution_s", "steps",
+              "model_mean_ms", "model_p50_ms", "model_p95_ms", "model_max_ms",
+              "messages", "bytes", "peak_rss_mb", "error"]
+if resource is None:
+    CSV_FIELDS.remove("peak_rss_mb")
+
+
+# ================= Instrumentation =================
+def timed(fn: Callable, latencies: List[float]) -> Callable:
+    """Wrap an async model call and record its latency."""
+    async def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - t0)
+    return wrapper
+
+
+def count_messages(agent, counter: Dict[str, int]):
+    """Count messages and JSON-encoded bytes sent by one agent."""
+    send = agent.schedule_instant_message
+
+    def wrapper(content, receiver_addr, *args, **kwargs):
+        counter["messages"] += 1
+        counter["bytes"] += len(json.dumps(content))
+        return send(content, receiver_addr, *args, **kwargs)
+    agent.schedule_instant_message = wrapper
+
+
+def latency_stats(latencies: List[float]) -> dict:
+    if not latencies:
+        return {"model_mean_ms": None, "model_p50_ms": None, "model_p95_ms": None, "model_max_ms": None}
+    ms = sorted(1000.0 * s for s in latencies)
+    return {
+        "model_mean_ms": statistics.fmean(ms),
+        "model_p50_ms": ms[len(ms) // 2],
+        "model_p95_ms": ms[int(0.95 * (len(ms) - 1))],
+        "model_max_ms": ms[-1],
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+# ================= One run (child process) =================
+def load_variant(variant: str):
+    path = os.path.join(HERE, VARIANT_FILES[variant])
+    spec = importlib.util.spec_from_file_location(f"bench_{variant}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def run_one(variant: str, n: int, seed: int) -> dict:
+    import mango
+    from conflict_index import conflicts
+    from standin_ollama import StandInOllama
+
+    module = load_variant(variant)
+    random.seed(seed)
+    module.SEED = seed
+    module.OUTER_STEPS = OUTER_STEPS
+    if hasattr(module, "torch"):
+        module.torch.manual_seed(seed)
+
+    server = None
+    if variant != "trm":
+        server = StandInOllama(seed=seed, latency_s=STANDIN_LATENCY_S, moves=STANDIN_MOVES)
+        await server.start()
+        module.OLLAMA_URL = server.url
+
+    latencies: List[float] = []
+    if variant == "main":
+        model = module.TinyLlamaClient(url=module.OLLAMA_URL)
+        model.propose_rows = timed(model.propose_rows, latencies)
+    elif variant == "trm":
+        model = module.make_proposer("trm", n)
+        model.propose = timed(model.propose, latencies)
+    else:
+        model = module.make_proposer("llm", n, k=1, model=module.MODEL_NAME, url=module.OLLAMA_URL,
+                                     temperature=module.TEMPERATURE, system=module.SYSTEM_PROMPT)
+        model.propose = timed(model.propose, latencies)
+
+    with mango.create_topology() as topo:
+        coord = module.Coordinator(n, model)
+        queens = [module.QueenAgent(i) for i in range(n)]
+        node_c = topo.add_node(coord)
+        for q in queens:
+            topo.add_edge(node_c, topo.add_node(q))
+
+    counter = {"messages": 0, "bytes": 0}
+    for agent in [coord, *queens]:
+        count_messages(agent, counter)
+
+    t0 = time.perf_counter()
+    tts = None
+    try:
+        async with mango.run_with_tcp(1, coord, *queens):
+            try:
+                await asyncio.wait_for(coord.finished.wait(), timeout=RUN_TIMEOUT_S)
+                tts = time.perf_counter() - t0
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await model.close()
+        if server is not None:
+            await server.stop()
+
+    # judged on the board the coordinator last committed, which every variant keeps
+    solved = tts is not None and conflicts(coord.board.rows) == 0
+    return {
+        "status": "ok" if tts is not None else "timeout",
+        "solved": solved,
+        "time_to_solution_s": tts if solved else None,
+        "steps": len(latencies),
+        **latency_stats(latencies),
+        **counter,
+    }
+
+
+def child_main(variant: str, n: int, seed: int, out_path: str) -> dict:
+    result = {"variant": variant, "n": n, "seed": seed}
+    try:
+        result.update(asyncio.run(run_one(variant, n, seed)))
+    except ImportError as e:
+        result.update(status="skipped", error=str(e))
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    if resource is not None:
+        result["peak_rss_mb"] = peak_rss_mb()
+    with open(out_path, "w") as f:
+        json.dump(result, f)
+    return result
+
+
+# ================= Grid (parent process) =================
+def run_grid(variants: List[str]) -> List[dict]:
+    results = []
+    for variant in variants:
+        for n in N_VALUES:
+            for r in range(REPEATS):
+                seed = SEED + r
+                fd, out_path = tempfile.mkstemp(suffix=".json")
+                os.close(fd)
+                try:
+                    subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "--one", variant, str(n), str(seed), out_path],
+                        cwd=HERE, timeout=RUN_TIMEOUT_S + 60,
+                        stdout=None if VERBOSE else subprocess.DEVNULL,
+                        stderr=None if VERBOSE else subprocess.DEVNULL,
+                    )
+                    with open(out_path) as f:
+                        res = json.load(f)
+                except (subprocess.TimeoutExpired, json.JSONDecodeError, OSError) as e:
+                    res = {"variant": variant, "n": n, "seed": seed, "status": "error", "error": repr(e)}
+                finally:
+                    os.unlink(out_path)
+                results.append(res)
+                print_row(res)
+    return results
+
+
+def print_row(res: dict):
+    def fmt(key, spec):
+        v = res.get(key)
+        return "-" if v is None else format(v, spec)
+    print(f"[Bench] {res['variant']:6s} n={res['n']:4d} seed={res['seed']} {res.get('status', '?'):8s} "
+          f"solved={res.get('solved', False)!s:5} tts={fmt('time_to_solution_s', '.3f')}s "
+          f"steps={fmt('steps', 'd')} model_p50={fmt('model_p50_ms', '.1f')}ms "
+          f"msgs={fmt('messages', 'd')} bytes={fmt('bytes', 'd')}"
+          + (f" rss={fmt('peak_rss_mb', '.1f')}MB" if resource is not None else "")
+          + (f" ({res['error']})" if res.get("error") else ""))
+
+
+def write_results(results: List[dict]):
+    if RESULTS_JSON:
+        with open(RESULTS_JSON, "w") as f:
+            json.dump({"config": {"seed": SEED, "repeats": REPEATS, "n_values": N_VALUES,
+                                  "outer_steps": OUTER_STEPS, "standin_latency_s": STANDIN_LATENCY_S,
+                                  "standin_moves": STANDIN_MOVES},
+                       "results": results}, f, indent=2)
+        print(f"[Bench] results written to {RESULTS_JSON}")
+    if RESULTS_CSV:
+        with open(RESULTS_CSV, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"[Bench] results written to {RESULTS_CSV}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--one":
+        res = child_main(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), sys.argv[5])
+        if res["status"] == "error":
+            sys.exit(f"{res['variant']} n={res['n']}: {res['error']}")
+    else:
+        chosen = sys.argv[1:] or VARIANTS
+        unknown = [v for v in chosen if v not in VARIANT_FILES]
+        if unknown:
+            sys.exit(f"unknown variant(s) {unknown}; choose from {list(VARIANT_FILES)}")
+        results = run_grid(chosen)
+        write_results(results)
+        failed = [r for r in results if r.get("status") == "error"]
+        if failed:
+            for r in failed:
+                print(f"[Bench] FAILED {r['variant']} n={r['n']} seed={r['seed']}: {r.get('error')}")
+            sys.exit(f"[Bench] {len(failed)} of {len(results)} run(s) failed")
@@ -0,0 +1,143 @@
+# board_protocol.py
+# Versioned delta protocol between the n-Queens Coordinator, its QueenAgents and viewers.
+# Instead of sending the whole board to every neighbor each step, the coordinator sends a
+# MOVE only to the queens whose row changed and one DELTA (list of changed columns) to each
+# viewer. Late joiners announce themselves with HELLO and get a compact SYNC.
+#
+# Messages:
+#   queen  -> coord   {"type": "HELLO", "role": "queen", "col": c}
+#   viewer -> coord   {"type": "HELLO", "role": "viewer"}
+#   coord  -> queen   {"type": "SYNC", "row": r, "version": v}
+#   coord  -> viewer  {"type": "SYNC_BOARD", "n": n, "rows": <packed>, "version": v, "step": s}
+#   coord  -> queen   {"type": "MOVE", "row": r, "version": v, "step": s}
+#   coord  -> viewer  {"type": "DELTA", "moves": [c0, r0, c1, r1, ...], "version": v, "step": s}
+#   queen  -> coord   {"type": "ACK", "col": c, "row": r, "version": v}
+# A viewer that sees a version gap sends HELLO again to resync.
+#
+# Usage (inside a Coordinator):
+#   self.board = BoardBroadcaster(self, n, rows)
+#   self.board.join(content, mango.sender_addr(meta))    # on HELLO
+#   movers = self.board.publish(new_rows, step)          # columns that owe an ACK
+#   self.board.resend(missing_cols)                       # after an ACK timeout
+
+import base64
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import mango
+
+
+def pack_rows(rows: Sequence[int]) -> str:
+    """Compact full-board encoding: little-endian uint32 array, base64."""
+    buf = array("I", rows)
+    if sys.byteorder == "big":
+        buf.byteswap()
+    return base64.b64encode(buf.tobytes()).decode("ascii")
+
+
+def unpack_rows(data: str) -> List[int]:
+    buf = array("I")
+    buf.frombytes(base64.b64decode(data))
+    if sys.byteorder == "big":
+        buf.byteswap()
+    return buf.tolist()
+
+
+def diff_rows(old: Sequence[int], new: Sequence[int]) -> List[Tuple[int, int]]:
+    """(col, new_row) for every column whose row changed."""
+    return [(c, r) for c, (o, r) in enumerate(zip(old, new)) if o != r]
+
+
+class BoardBroadcaster:
+    """Coordinator-side bookkeeping: who is which column, who watches, and the last
+    committed board with its version.
+    """
+    def __init__(self, agent: mango.Agent, n: int, rows: Sequence[int]):
+        self.agent = agent
+        self.n = n
+        self.rows: List[int] = list(rows)
+        self.version = 0
+        self.step = 0
+        self.queens: Dict[int, object] = {}      # col -> address
+        self.viewers: List[object] = []
+
+    @property
+    def all_joined(self) -> bool:
+        return len(self.queens) == self.n
+
+    def join(self, content: dict, addr) -> bool:
+        """Register a HELLO and answer with a SYNC. Returns True if every queen has joined."""
+        if content.get("role") == "viewer":
+            if addr not in self.viewers:
+                self.viewers.append(addr)
+            self.agent.schedule_instant_message({
+                "type": "SYNC_BOARD", "n": self.n, "rows": pack_rows(self.rows),
+                "version": self.version, "step": self.step,
+            }, addr)
+        else:
+            col = int(content["col"])
+            self.queens[col] = addr
+            self.agent.schedule_instant_message(
+                {"type": "SYNC", "row": self.rows[col], "version": self.version}, addr
+            )
+        return self.all_joined
+
+    def publish(self, rows: Sequence[int], step: int) -> List[int]:
+        """Commit `rows` as the next version and send MOVE/DELTA messages for what changed.
+        Returns the columns that were sent a MOVE (joined queens that owe an ACK).
+        """
+        moves = diff_rows(self.rows, rows)
+        self.version += 1
+        self.step = step
+        for c, r in moves:
+            self.rows[c] = r
+        movers = [c for c, _ in moves if c in self.queens]
+        self.resend(movers)
+        flat = [x for move in moves for x in move]
+        for addr in self.viewers:
+            self.agent.schedule_instant_message(
+                {"type": "DELTA", "moves": flat, "version": self.version, "step": step}, addr
+            )
+        return movers
+
+    def resend(self, cols: Iterable[int]):
+        """(Re)send the current row of each column as a MOVE under the current version."""
+        for c in cols:
+            self.agent.schedule_instant_message(
+                {"type": "MOVE", "row": self.rows[c], "version": self.version, "step": self.step},
+                self.queens[c],
+            )
+
+
+class QueenAgent(mango.Agent):
+    """Holds one column's row. Joins via HELLO, applies MOVE/SYNC and ACKs each MOVE."""
+    def __init__(self, col_idx: int):
+        super().__init__()
+        self.col = col_idx
+        self.row: Optional[int] = None
+        self.version = -1
+
+    def on_ready(self):
+        for nb in self.neighbors():
+            self.schedule_instant_message({"type": "HELLO", "role": "queen", "col": self.col}, nb)
+
+    def handle_message(self, content, meta):
+        t = content.get("type")
+        if t == "MOVE":
+            version = int(content["version"])
+            if version > self.version:
+                self.row = int(content["row"])
+                self.version = version
+            self.schedule_instant_message(
+                {"type": "ACK", "col": self.col, "row": self.row, "version": version}, mango.sender_addr(meta)
+            )
+        elif t == "SYNC":
+            version = int(content["version"])
+            if version > self.version:
+                row = content["row"]
+                self.row = None if row is None else int(row)   # None: column not placed yet
+                self.version = version
+        elif t == "DONE":
+            # ignore
+            pass
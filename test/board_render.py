@@ -0,0 +1,156 @@
+# board_render.py
+# Frame renderers for n-Queens boards. They are plain module-level functions so they can
+# run in RenderPool worker processes; the VisualizerAgent only ships (n, rows, step) over.
+#
+# Renderers (pick one by name with RENDERERS[mode]):
+#   "classic"     render_png: a fresh figure per frame, one Rectangle per dark square
+#   "persistent"  render_png_persistent: one BoardFigure per board size, reused across
+#                 frames. The checkerboard is a single raster drawn once and cached as the
+#                 blit background; each frame only restores it and redraws the animated
+#                 artists (queen markers, title, conflict label), so the cost per frame
+#                 stays roughly flat up to n=256.
+#   "raster"      render_png_raster: pure NumPy painter (raster_render.py), no matplotlib;
+#                 downsamples boards bigger than MAX_PX.
+#
+# render_frame(mode, ...) returns the in-memory RGB frame used by the streaming encoder.
+#
+# Requirements:
+#   pip install matplotlib numpy
+
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from conflict_index import conflicts
+from raster_render import raster_frame, render_png_raster
+
+QUEEN_GLYPH = "$\u265b$"       # mathtext marker for ♛
+LIGHT = (1.0, 1.0, 1.0)
+DARK = (0.912, 0.947, 0.971)    # matplotlib C0 at alpha 0.1 over white, as in the classic renderer
+MAX_TICKS = 32                  # label every row/column only up to this board size
+
+
+def render_png(n: int, rows: List[int], step: int, out_dir: str, annotate_conflicts: bool = True) -> str:
+    """Draw one board with matplotlib and save it as out_dir/step_XXX.png."""
+    import matplotlib
+    matplotlib.use("Agg")  # headless rendering
+    import matplotlib.pyplot as plt
+    from matplotlib.patches import Rectangle
+
+    fig, ax = plt.subplots(figsize=(5, 5))
+    ax.set_xlim(0, n)
+    ax.set_ylim(0, n)
+    ax.set_xticks(range(n))
+    ax.set_yticks(range(n))
+    ax.set_aspect('equal')
+    ax.grid(True, which='both')
+    ax.invert_yaxis()
+    ax.set_title(f"n-Queens step {step}")
+
+    # draw board squares
+    for i in range(n):
+        for j in range(n):
+            if (i + j) % 2 == 0:
+                # leave default background for one color
+                pass
+            else:
+                ax.add_patch(Rectangle((i, j), 1, 1, alpha=0.1))
+
+    # draw queens and optional conflict markers
+    for c, r in enumerate(rows):
+        ax.text(c + 0.5, r + 0.6, "♛", ha='center', va='center', fontsize=18)
+    # compute conflicts for annotation
+    if annotate_conflicts:
+        ax.text(0.02, 0.98, f"conflicts: {conflicts(rows)}", transform=ax.transAxes, va='top')
+
+    frame_path = os.path.join(out_dir, f"step_{step:03d}.png")
+    plt.tight_layout()
+    fig.savefig(frame_path, dpi=140)
+    plt.close(fig)
+    print(f"[Visualizer] wrote {frame_path}")
+    return frame_path
+
+
+class BoardFigure:
+    """A reusable figure for one board size; render() returns the frame as an RGB array."""
+    def __init__(self, n: int, annotate_conflicts: bool = True, size_in: float = 5.0, dpi: int = 140):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.n = n
+        self.annotate_conflicts = annotate_conflicts
+        self.fig = Figure(figsize=(size_in, size_in), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.fig.add_subplot()
+        self.ax = ax
+
+        # static part: checkerboard raster, limits and ticks
+        parity = np.add.outer(np.arange(n), np.arange(n)) % 2
+        board = np.where(parity[..., None] == 1, DARK, LIGHT)
+        ax.imshow(board, extent=(0, n, n, 0), interpolation="nearest")
+        ax.set_xlim(0, n)
+        ax.set_ylim(n, 0)
+        ax.set_aspect('equal')
+        if n <= MAX_TICKS:
+            ax.set_xticks(range(n))
+            ax.set_yticks(range(n))
+            ax.grid(True, which='both')
+
+        # animated part: redrawn every frame on top of the cached background
+        self.title = ax.set_title("n-Queens step 0", animated=True)
+        self.fig.tight_layout()
+        cell_pt = ax.get_window_extent().width / n * 72.0 / dpi
+        (self.queens,) = ax.plot([], [], linestyle="", marker=QUEEN_GLYPH, color="k",
+                                 markersize=0.8 * cell_pt, animated=True)
+        self.label = ax.text(0.02, 0.98, "", transform=ax.transAxes, va='top', animated=True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def render(self, rows: List[int], step: int) -> np.ndarray:
+        self.canvas.restore_region(self.background)
+        cols = np.arange(len(rows)) + 0.5
+        self.queens.set_data(cols, np.asarray(rows) + 0.5)
+        self.title.set_text(f"n-Queens step {step}")
+        self.ax.draw_artist(self.title)
+        self.ax.draw_artist(self.queens)
+        if self.annotate_conflicts:
+            self.label.set_text(f"conflicts: {conflicts(rows)}")
+            self.ax.draw_artist(self.label)
+        self.canvas.blit(self.fig.bbox)
+        return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+
+_FIGURES: Dict[Tuple[int, bool], BoardFigure] = {}   # per worker process
+
+
+def board_figure(n: int, annotate_conflicts: bool = True) -> BoardFigure:
+    fig = _FIGURES.get((n, annotate_conflicts))
+    if fig is None:
+        fig = _FIGURES[(n, annotate_conflicts)] = BoardFigure(n, annotate_conflicts)
+    return fig
+
+
+def render_png_persistent(n: int, rows: List[int], step: int, out_dir: str, annotate_conflicts: bool = True) -> str:
+    """Same output file as render_png, drawn on the cached BoardFigure for this n."""
+    from matplotlib.image import imsave
+
+    frame = board_figure(n, annotate_conflicts).render(rows, step)
+    frame_path = os.path.join(out_dir, f"step_{step:03d}.png")
+    imsave(frame_path, frame)
+    print(f"[Visualizer] wrote {frame_path}")
+    return frame_path
+
+
+RENDERERS = {
+    "classic": render_png,
+    "persistent": render_png_persistent,
+    "raster": render_png_raster,
+}
+
+
+def render_frame(mode: str, n: int, rows: List[int], step: int, annotate_conflicts: bool = True) -> np.ndarray:
+    """In-memory RGB frame; "classic" has no array form and uses the persistent figure."""
+    if mode == "raster":
+        return raster_frame(n, rows, step, annotate_conflicts)
+    return board_figure(n, annotate_conflicts).render(rows, step)
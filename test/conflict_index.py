@@ -0,0 +1,127 @@
+# conflict_index.py
+# Shared conflict counting for the n-Queens scripts.
+# A board is a list of rows, one per column. Two queens conflict when they share a row,
+# a diagonal (row - col) or an anti-diagonal (row + col). Keeping occupancy counters per
+# line turns the pairwise O(n^2) scan into an O(n) rebuild and O(1) single-queen moves:
+# a line holding k queens contributes k*(k-1)/2 conflicting pairs.
+#
+# Usage:
+#   from conflict_index import ConflictIndex, conflicts
+#   idx = ConflictIndex(rows)
+#   idx.total                   # pairwise conflicts, same number as the old helper
+#   idx.move(col, new_row)      # O(1) update
+#   batch_conflicts(boards)     # NumPy: [B, n] boards -> [B] conflict counts
+#
+# Requirements:
+#   pip install numpy           # only for batch_conflicts
+
+from typing import List, Sequence
+
+
+class ConflictIndex:
+    """Row, diagonal and anti-diagonal occupancy counters for one board.
+    Rows must lie in [0, n) where n = len(rows); ValueError otherwise (rebuild and move).
+    """
+    def __init__(self, rows: Sequence[int]):
+        self.rebuild(rows)
+
+    def rebuild(self, rows: Sequence[int]):
+        """O(n) full rebuild from a complete assignment."""
+        n = len(rows)
+        self.n = n
+        self.rows: List[int] = [int(r) for r in rows]
+        self.row_count = [0] * n
+        self.diag = [0] * max(1, 2 * n - 1)    # index r - c + n - 1
+        self.anti = [0] * max(1, 2 * n - 1)    # index r + c
+        total = 0
+        for c, r in enumerate(self.rows):
+            if not 0 <= r < n:
+                raise ValueError(f"row {r} of column {c} is outside [0, {n})")
+            d = r - c + n - 1
+            a = r + c
+            # each queen already on the line forms one new pair
+            total += self.row_count[r] + self.diag[d] + self.anti[a]
+            self.row_count[r] += 1
+            self.diag[d] += 1
+            self.anti[a] += 1
+        self.total = total
+
+    @classmethod
+    def from_counts(cls, rows: List[int], row_count: List[int], diag: List[int], anti: List[int]) -> "ConflictIndex":
+        """Adopt counters a caller has already built for `rows` (skips the rebuild pass)."""
+        self = cls.__new__(cls)
+        self.n = len(rows)
+        self.rows = rows
+        self.row_count = row_count
+        self.diag = diag
+        self.anti = anti
+        self.total = sum(k * (k - 1) for line in (row_count, diag, anti) for k in line if k > 1) // 2
+        return self
+
+    def attacks(self, col: int, row: int) -> int:
+        """Number of queens (other than the one in `col`) attacking square (row, col)."""
+        n = self.n
+        hits = self.row_count[row] + self.diag[row - col + n - 1] + self.anti[row + col]
+        if self.rows[col] == row:
+            hits -= 3
+        return hits
+
+    def queen_conflicts(self, col: int) -> int:
+        """Conflicts the queen in `col` currently takes part in."""
+        return self.attacks(col, self.rows[col])
+
+    def move(self, col: int, row: int) -> int:
+        """Move the queen in `col` to `row` in O(1). Returns the new total."""
+        n = self.n
+        if not (0 <= col < n and 0 <= row < n):
+            raise ValueError(f"square (col {col}, row {row}) is outside the {n}x{n} board")
+        old = self.rows[col]
+        if old == row:
+            return self.total
+        self.total -= self.attacks(col, old)
+        self.row_count[old] -= 1
+        self.diag[old - col + n - 1] -= 1
+        self.anti[old + col] -= 1
+        self.rows[col] = row
+        self.total += self.row_count[row] + self.diag[row - col + n - 1] + self.anti[row + col]
+        self.row_count[row] += 1
+        self.diag[row - col + n - 1] += 1
+        self.anti[row + col] += 1
+        return self.total
+
+    def assign(self, rows: Sequence[int]) -> int:
+        """Switch to a new assignment by moving only the columns that differ."""
+        if len(rows) != self.n:
+            self.rebuild(rows)
+            return self.total
+        for c, r in enumerate(rows):
+            if self.rows[c] != r:
+                self.move(c, int(r))
+        return self.total
+
+
+def conflicts(rows: Sequence[int]) -> int:
+    """Count pairwise conflicts for a full assignment (one row per column) in O(n)."""
+    return ConflictIndex(rows).total
+
+
+def batch_conflicts(boards):
+    """Score a batch of candidate boards at once.
+    boards: int array-like [B, n] with rows in [0, n). Returns an int64 array [B].
+    """
+    import numpy as np
+
+    b = np.asarray(boards, dtype=np.int64)
+    if b.ndim == 1:
+        b = b[None, :]
+    bsz, n = b.shape
+    if n == 0:
+        return np.zeros(bsz, dtype=np.int64)
+    cols = np.arange(n, dtype=np.int64)
+    lines = 2 * n - 1
+    offs = np.arange(bsz, dtype=np.int64)[:, None]
+    total = np.zeros(bsz, dtype=np.int64)
+    for keys, width in ((b, n), (b - cols + n - 1, lines), (b + cols, lines)):
+        counts = np.bincount((keys + offs * width).ravel(), minlength=bsz * width).reshape(bsz, width)
+        total += (counts * (counts - 1) // 2).sum(axis=1)
+    return total
@@ -0,0 +1,136 @@
+# coordinator.py
+# Outer-step loop shared by the n-Queens coordinators (tiny_solution.py, solution_gemma.py,
+# main.py, batch_service.py, other_implementations/torch_trm.py). Each step asks the proposer
+# for (y', z', halt) given (x, y, z), commits y' if accept() allows it (by default: no more
+# conflicts than y), publishes the committed rows with the delta protocol (board_protocol.py)
+# and waits for the movers' ACKs, resending MOVE to queens that miss the ACK timeout. Queens
+# and viewers join with HELLO; the first join starts step 1. INFER_RESULT replies are handed
+# to the proposer (inference_agent.RemoteProposer).
+#
+# Usage:
+#   class MyCoordinator(StepCoordinator):
+#       async def finish(self):            # called once when the run ends
+#           ...
+#       def accept(self, new_rows, old_conf, step):   # optional: own commit policy
+#           ...
+#   coord = MyCoordinator(n, proposer, outer_steps=32)
+#   await coord.finished.wait()
+
+import asyncio
+from typing import List, Optional
+
+import mango
+
+from agent_based import StepBarrier
+from board_protocol import BoardBroadcaster
+from conflict_index import ConflictIndex, conflicts
+from proposers import Proposal, Proposer
+
+# ================= Config =================
+ACK_TIMEOUT_S = 5.0      # resend MOVE to queens that have not ACKed by then
+ACK_RETRIES = 3
+HALT_STOP = 0.9          # stop once the proposer's halt probability exceeds this (None = never)
+
+
+class StepCoordinator(mango.Agent):
+    verbose = True       # print per-step progress and ACK problems
+
+    def __init__(self, n: int, proposer: Proposer, outer_steps: int, ack_timeout: float = ACK_TIMEOUT_S,
+                 ack_retries: int = ACK_RETRIES, halt_stop: Optional[float] = HALT_STOP, name: str = "acks"):
+        super().__init__()
+        self.n = n
+        self.proposer = proposer
+        self.outer_steps = outer_steps
+        self.ack_retries = ack_retries
+        self.halt_stop = halt_stop
+        # TRM state: x (observed board), y (proposal), z (latent scratchpad)
+        self.x_rows: List[int] = [i % n for i in range(n)]  # observed board (here same as y initially)
+        self.y_rows: List[int] = self.x_rows.copy()         # proposal refined across steps
+        self.z_text: str = ""                                 # latent scratchpad text
+        self.index = ConflictIndex(self.y_rows)               # incremental conflict counters for y
+        self.board = BoardBroadcaster(self, n, self.y_rows)   # y as frame 0, sent to joiners as SYNC
+        self.started = False
+        self.barrier = StepBarrier(timeout=ack_timeout, name=name)   # keyed by board version
+        self.finished = asyncio.Event()                              # set when the run ends
+        self.steps = 0
+        self.errors = 0
+
+    def log(self, msg: str):
+        if self.verbose:
+            print(f"[Coordinator] {msg}")
+
+    def handle_message(self, content, meta):
+        t = content.get("type")
+        if t == "SOLVE":
+            asyncio.create_task(self._outer_step(content.get("step", 1)))
+        elif t == "HELLO":
+            # queens and viewers join (or rejoin) and get a SYNC of the committed board
+            if self.board.join(content, mango.sender_addr(meta)) and not self.started:
+                self.started = True
+                self.on_start()
+                self.schedule_instant_message({"type": "SOLVE", "step": 1}, self.addr)
+        elif t == "ACK":
+            self.barrier.arrive(content.get("version"), content.get("col"))
+        elif t == "INFER_RESULT":
+            # reply from the InferenceAgent when the proposer is a RemoteProposer
+            self.proposer.deliver(content)
+
+    # ----- hooks -----
+    def on_start(self):
+        """The first participant joined; step 1 is about to run."""
+
+    async def finish(self):
+        """The run ended (solved, halted or out of steps)."""
+
+    def accept(self, new_rows: List[int], old_conf: int, step: int) -> bool:
+        """Commit policy (can be changed to simulated annealing or min-conflicts gate)."""
+        return conflicts(new_rows) <= old_conf or step < 2
+
+    # ----- loop -----
+    async def _broadcast_rows_and_wait(self, rows_int: List[int], step: int):
+        # MOVE to the queens whose row changed, DELTA to viewers; wait only for the movers
+        movers = self.board.publish(rows_int, step)
+        self.barrier.open(self.board.version, movers)
+        for _ in range(self.ack_retries):
+            if await self.barrier.wait():
+                return
+            missing = sorted(self.barrier.missing)
+            self.log(f"step {step}: no ACK from {len(missing)} queen(s) {missing[:8]}, resending")
+            self.board.resend(missing)
+        if not await self.barrier.wait():
+            self.log(f"step {step}: giving up on {len(self.barrier.missing)} missing ACK(s)")
+
+    async def _propose(self, step: int) -> Proposal:
+        try:
+            # TRM step: (x, y, z) -> (y', z', halt)
+            return await self.proposer.propose(self.n, self.x_rows, self.y_rows, self.z_text, step)
+        except Exception as e:
+            self.errors += 1
+            self.log(f"{self.proposer.name} error at step {step}: {e}. Keeping previous rows.")
+            return self.y_rows, 0.0, "retry fallback", self.z_text
+
+    async def _outer_step(self, step: int):
+        self.steps = step
+        old_conf = self.index.total
+        new_rows, halt_prob, why, z_new = await self._propose(step)
+
+        if self.accept(new_rows, old_conf, step):
+            self.y_rows = new_rows
+            self.index.assign(new_rows)
+            self.z_text = z_new
+        else:
+            halt_prob *= 0.5
+
+        await self._broadcast_rows_and_wait(self.y_rows, step)
+
+        c = self.index.total
+        self.log(f"step {step}: conflicts {old_conf} -> {c}, halt={halt_prob:.2f}, why={why[:80]}")
+
+        halted = self.halt_stop is not None and halt_prob > self.halt_stop
+        if c == 0 or halted or step + 1 > self.outer_steps:
+            self.log("Done.")
+            self.log(f"ACK barrier latency: {self.barrier.histogram.summary()}")
+            self.finished.set()
+            await self.finish()
+            return
+        self.schedule_instant_message({"type": "SOLVE", "step": step + 1}, self.addr)
@@ -0,0 +1,204 @@
+# frame_writer.py
+# Incremental GIF/MP4 writers fed with in-memory RGB frames (H x W x 3 uint8 arrays).
+# Nothing is buffered except the most recent frame: it is held back until the next
+# different frame arrives, so consecutive identical boards collapse into one frame with a
+# longer duration. Memory stays bounded no matter how many steps a run has.
+#
+#   GIF  each frame is palette-quantized and LZW-encoded by Pillow on its own, then its
+#        image block is appended to the open file with a per-frame delay.
+#   MP4  frames are piped to ffmpeg (imageio-ffmpeg); a collapsed frame is repeated.
+#
+# Usage:
+#   writer = open_writer("run.gif", fps=2)
+#   writer.append(frame, key=tuple(rows))   # same key as the previous frame -> longer hold
+#   writer.close()
+#
+# In render workers, render_to_stream()/close_stream() keep one writer per output path
+# (see VisualizerAgent(animation_path=...)).
+#
+# Requirements:
+#   pip install numpy pillow
+#   For MP4: pip install imageio-ffmpeg
+
+import io
+import os
+import struct
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+
+LOOP_FOREVER = 0
+
+
+class FrameWriter:
+    """Holds back the newest frame so repeats only extend its duration."""
+    def __init__(self, path: str, fps: float = 2):
+        self.path = path
+        self.fps = fps
+        self.frames_in = 0
+        self.frames_out = 0
+        self._pending: Optional[np.ndarray] = None
+        self._pending_key: Optional[Hashable] = None
+        self._repeats = 0
+
+    def repeat(self, key: Hashable) -> bool:
+        """Extend the held frame if `key` matches it; lets callers skip rendering repeats."""
+        if self._pending is None or key is None or key != self._pending_key:
+            return False
+        self.frames_in += 1
+        self._repeats += 1
+        return True
+
+    def append(self, frame: np.ndarray, key: Optional[Hashable] = None):
+        if self.repeat(key):
+            return
+        self._flush()
+        self.frames_in += 1
+        self._pending = np.ascontiguousarray(frame[..., :3], dtype=np.uint8)
+        self._pending_key = key
+        self._repeats = 1
+
+    def _flush(self):
+        if self._pending is not None:
+            self._write(self._pending, self._repeats)
+            self.frames_out += 1
+            self._pending = None
+
+    def _write(self, frame: np.ndarray, repeats: int):
+        raise NotImplementedError
+
+    def close(self):
+        self._flush()
+        self._finish()
+
+    def _finish(self):
+        pass
+
+
+class StreamingGifWriter(FrameWriter):
+    def __init__(self, path: str, fps: float = 2, loop: int = LOOP_FOREVER):
+        super().__init__(path, fps)
+        self.loop = loop
+        self._f = None
+
+    def _header(self, width: int, height: int):
+        self._f = open(self.path, "wb")
+        # logical screen without a global color table; every frame carries its own palette
+        self._f.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+        self._f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\x00")
+
+    def _write(self, frame: np.ndarray, repeats: int):
+        from PIL import Image
+
+        height, width = frame.shape[:2]
+        if self._f is None:
+            self._header(width, height)
+        img = Image.fromarray(frame, "RGB").quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        buf = io.BytesIO()
+        img.save(buf, format="GIF", optimize=False, interlace=False)
+        palette, image_block = _split_single_gif(buf.getvalue())
+        delay = max(1, round(100.0 * repeats / self.fps))   # GIF delays are in 1/100 s
+        self._f.write(b"\x21\xf9\x04\x00" + struct.pack("<H", delay) + b"\x00\x00")
+        # image descriptor: move Pillow's global palette into a local color table
+        left, top, w, h, flags = struct.unpack("<HHHHB", image_block[1:10])
+        size_bits = max(0, (len(palette) // 3 - 1).bit_length() - 1)
+        table = palette.ljust(3 * (2 << size_bits), b"\x00")
+        flags = 0x80 | (flags & 0x40) | size_bits     # local table, keep the interlace bit
+        self._f.write(b"\x2c" + struct.pack("<HHHHB", left, top, w, h, flags) + table)
+        self._f.write(image_block[10:])
+
+    def _finish(self):
+        if self._f is not None:
+            self._f.write(b"\x3b")
+            self._f.close()
+            self._f = None
+
+
+def _split_single_gif(data: bytes):
+    """Return (color table, image descriptor + LZW data) of a one-frame GIF."""
+    flags = data[10]
+    pos = 13
+    palette = b""
+    if flags & 0x80:
+        size = 3 * (2 << (flags & 0x07))
+        palette = data[pos:pos + size]
+        pos += size
+    while data[pos] == 0x21:                 # skip extensions
+        pos += 2
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    if data[pos] != 0x2C:
+        raise ValueError("no image descriptor in GIF data")
+    start = pos
+    flags = data[pos + 9]
+    pos += 10
+    if flags & 0x80:                         # Pillow wrote a local table instead
+        size = 3 * (2 << (flags & 0x07))
+        palette = data[pos:pos + size]
+        data = data[:start + 10] + data[pos + size:]
+        pos = start + 10
+    pos += 1                                 # LZW minimum code size
+    while data[pos]:
+        pos += data[pos] + 1
+    return palette, data[start:pos + 1]
+
+
+class StreamingMp4Writer(FrameWriter):
+    def __init__(self, path: str, fps: float = 2):
+        super().__init__(path, fps)
+        self._gen = None
+
+    def _write(self, frame: np.ndarray, repeats: int):
+        # yuv420p needs even dimensions
+        frame = frame[: frame.shape[0] // 2 * 2, : frame.shape[1] // 2 * 2]
+        if self._gen is None:
+            import imageio_ffmpeg
+
+            height, width = frame.shape[:2]
+            self._gen = imageio_ffmpeg.write_frames(self.path, (width, height), fps=self.fps,
+                                                    macro_block_size=1, pix_fmt_out="yuv420p")
+            self._gen.send(None)
+        data = np.ascontiguousarray(frame).tobytes()
+        for _ in range(repeats):
+            self._gen.send(data)
+
+    def _finish(self):
+        if self._gen is not None:
+            self._gen.close()
+            self._gen = None
+
+
+def open_writer(path: str, fps: float = 2) -> FrameWriter:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".gif":
+        return StreamingGifWriter(path, fps)
+    if ext in (".mp4", ".m4v", ".mov"):
+        return StreamingMp4Writer(path, fps)
+    raise ValueError(f"unsupported animation format {ext!r} (use .gif or .mp4)")
+
+
+# ---------- render-worker side ----------
+_WRITERS: Dict[str, FrameWriter] = {}   # per worker process, keyed by output path
+
+
+def render_to_stream(n: int, rows: List[int], step: int, path: str, fps: float = 2,
+                     annotate_conflicts: bool = True, mode: str = "persistent") -> int:
+    """Render one board and append it to the writer for `path`. Returns frames seen so far."""
+    from board_render import render_frame
+
+    writer = _WRITERS.get(path)
+    if writer is None:
+        writer = _WRITERS[path] = open_writer(path, fps)
+    key = tuple(rows)
+    if not writer.repeat(key):
+        writer.append(render_frame(mode, n, rows, step, annotate_conflicts), key)
+    return writer.frames_in
+
+
+def close_stream(path: str) -> Optional[dict]:
+    writer = _WRITERS.pop(path, None)
+    if writer is None:
+        return None
+    writer.close()
+    return {"path": path, "frames_in": writer.frames_in, "frames_out": writer.frames_out}
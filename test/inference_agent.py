@@ -0,0 +1,123 @@
+# inference_agent.py
+# A mango agent that owns one shared model and serves proposals to many Coordinators.
+# Coordinators talk to it with messages instead of calling the model themselves:
+#   -> {type: INFER, client, id, n, x, y, z, step}
+#   <- {type: INFER_RESULT, id, rows, q, why, z}      or {type: INFER_RESULT, id, error}
+#   -> {type: BYE, client}                             drop the client's per-instance state
+# Requests are collected by a ModelService (model_service.py): it waits a short window,
+# takes up to max_batch requests round-robin across clients and runs them as one batch on
+# the backend (e.g. one batched forward pass in a worker thread), so the model compute is
+# amortized and message handling never waits on it.
+#
+# Usage:
+#   server = InferenceAgent(backend)                  # any ModelService backend
+#   proposer = RemoteProposer(server)                 # one per Coordinator
+#   coord = Coordinator(n, proposer); proposer.bind(coord)
+#   # the Coordinator forwards INFER_RESULT messages to proposer.deliver(content)
+#   ...
+#   await server.stop()
+
+import asyncio
+import itertools
+import uuid
+from typing import Dict, Optional
+
+import mango
+
+from model_service import BATCH_WINDOW_S, MAX_BATCH, ModelService, ProposalRequest
+from proposers import Proposal, Proposer
+
+# ================= Config =================
+INFER_TIMEOUT_S = 30.0   # a Coordinator gives up on a request after this long
+
+
+class InferenceAgent(mango.Agent):
+    def __init__(self, backend, max_batch: int = MAX_BATCH, window_s: float = BATCH_WINDOW_S):
+        super().__init__()
+        self.service = ModelService(backend, max_batch=max_batch, window_s=window_s)
+        self._clients: Dict[str, int] = {}      # client id -> ModelService instance
+        self._next_instance = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def on_ready(self):
+        self._dispatcher = asyncio.create_task(self.service.run())
+
+    def handle_message(self, content, meta):
+        t = content.get("type")
+        if t == "INFER":
+            asyncio.create_task(self._serve(content, mango.sender_addr(meta)))
+        elif t == "BYE":
+            instance = self._clients.pop(content.get("client"), None)
+            if instance is not None:
+                self.service.backend.forget(instance)
+
+    async def _serve(self, content, reply_to):
+        client = content["client"]
+        instance = self._clients.get(client)
+        if instance is None:
+            instance = self._clients[client] = next(self._next_instance)
+        req = ProposalRequest(instance, int(content["n"]), content["x"], content["y"],
+                              content.get("z", ""), int(content.get("step", 0)))
+        try:
+            rows, q, why, z = await self.service.submit(req)
+            reply = {"type": "INFER_RESULT", "id": content["id"], "rows": [int(r) for r in rows],
+                     "q": float(q), "why": why, "z": z}
+        except Exception as e:
+            reply = {"type": "INFER_RESULT", "id": content["id"], "error": f"{type(e).__name__}: {e}"}
+        self.schedule_instant_message(reply, reply_to)
+
+    async def stop(self):
+        print(f"[Inference] {self.service.stats()}")
+        await self.service.stop()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+
+
+class RemoteProposer(Proposer):
+    """Proposer that forwards requests to an InferenceAgent and waits for the reply message."""
+    name = "remote"
+
+    def __init__(self, server, client: Optional[str] = None, timeout: float = INFER_TIMEOUT_S):
+        self.server = server                    # the InferenceAgent, or its address
+        self.client = client or uuid.uuid4().hex
+        self.timeout = timeout
+        self.agent: Optional[mango.Agent] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count()
+
+    def bind(self, agent: mango.Agent):
+        """The agent whose mailbox sends requests and receives INFER_RESULT."""
+        self.agent = agent
+
+    def _server_addr(self):
+        return self.server.addr if isinstance(self.server, mango.Agent) else self.server
+
+    async def propose(self, n, x_rows, y_rows, z_text, step) -> Proposal:
+        if self.agent is None:
+            raise RuntimeError("RemoteProposer is not bound to an agent")
+        rid = next(self._ids)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[rid] = fut
+        self.agent.schedule_instant_message({
+            "type": "INFER", "client": self.client, "id": rid, "n": n,
+            "x": list(x_rows), "y": list(y_rows), "z": z_text, "step": step,
+        }, self._server_addr())
+        try:
+            return await asyncio.wait_for(fut, timeout=self.timeout)
+        finally:
+            self._pending.pop(rid, None)
+
+    def deliver(self, content) -> bool:
+        """Resolve the request an INFER_RESULT answers. Returns False if it was stale."""
+        fut = self._pending.get(content.get("id"))
+        if fut is None or fut.done():
+            return False
+        if "error" in content:
+            fut.set_exception(RuntimeError(content["error"]))
+        else:
+            fut.set_result((content["rows"], content["q"], content["why"], content["z"]))
+        return True
+
+    async def close(self):
+        if self.agent is not None:
+            self.agent.schedule_instant_message({"type": "BYE", "client": self.client}, self._server_addr())
@@ -0,0 +1,82 @@
+# llm_cache.py
+# Response cache in front of the Ollama client.
+# Entries are keyed on a stable hash of the endpoint plus whatever the caller considers
+# the request identity (model, prompt payload, sampling parameters). A bounded in-memory
+# LRU serves repeated states within a run; an optional SQLite file keeps entries across
+# restarts so benchmark reruns skip the model entirely.
+#
+# Usage:
+#   cache = ResponseCache(max_entries=256, path="llm_cache.sqlite")
+#   http = OllamaClient(url, cache=cache)
+#   ...
+#   print(cache.stats())
+
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from typing import Optional
+
+
+def cache_key(endpoint: str, key_obj) -> str:
+    blob = json.dumps({"endpoint": endpoint, "key": key_obj}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.path = path
+        self._mem: "OrderedDict[str, str]" = OrderedDict()   # key -> JSON text
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body TEXT NOT NULL)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[dict]:
+        body = self._mem.get(key)
+        if body is not None:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return json.loads(body)
+        if self._db is not None:
+            row = self._db.execute("SELECT body FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._remember(key, row[0])
+                self.hits += 1
+                self.disk_hits += 1
+                return json.loads(row[0])
+        self.misses += 1
+        return None
+
+    def put(self, key: str, data: dict):
+        body = json.dumps(data)
+        self._remember(key, body)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO responses (key, body) VALUES (?, ?)", (key, body))
+            self._db.commit()
+
+    def _remember(self, key: str, body: str):
+        self._mem[key] = body
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._mem),
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,161 @@
+# llm_client.py
+# TRM-style LLM client and proposer factory shared by tiny_solution.py and solution_gemma.py.
+# TinyLlamaClient passes (x, y, z) to an Ollama chat model and parses (y', z', halt, why)
+# from its JSON answer, falling back to /generate when /chat fails. With STREAMING the rows
+# are validated while tokens arrive (stream_parse.py) and provably bad answers are aborted.
+# Responses are cached through the OllamaClient's optional ResponseCache (llm_cache.py) under
+# the request identity, which leaves out the step counter.
+# The scripts keep their own model, temperature, URL and system prompt and pass them in; the
+# HTTP and streaming knobs below are shared.
+#
+# Usage:
+#   proposer = make_proposer("llm", n, k=1, cache=cache, model="tinyllama", temperature=0.8)
+#   rows, halt, why, z = await proposer.propose(n, x_rows, y_rows, z_text, step)
+#   await proposer.close()
+
+import json
+from typing import List, Optional, Tuple
+
+from llm_cache import ResponseCache
+from ollama_client import OllamaClient
+from proposers import LLMProposer, MinConflictsProposer, Proposer, SpeculativeProposer
+from stream_parse import RowsStreamParser, StreamAborted
+
+# ================= Config =================
+MODEL_NAME = "tinyllama"     # Ollama model tag
+OLLAMA_URL = "http://localhost:11434/api"
+TIMEOUT_S = 60
+TEMPERATURE = 0.8
+CLIENT_MODE = "async"        # "async" (aiohttp pool) or "thread" (requests in a thread pool)
+MAX_CONNECTIONS = 4          # keep-alive connections to the LLM server
+MAX_CONCURRENCY = 2          # LLM requests in flight at the same time
+TEMPERATURE_SPREAD = 0.3     # temperature added per extra speculative LLM proposal
+STREAMING = True             # validate rows while tokens arrive, abort provably bad answers
+MAX_RESPONSE_CHARS = 4000    # abort generations longer than this (+4 chars per column)
+SYSTEM_PROMPT = (
+    "You are a recursive reasoning module implementing a Tiny Recursive Model (TRM)."
+    "Inputs: x=current board (rows per column), y=previous proposal, z=latent scratchpad."
+    "At each step, refine z and then refine y to reduce conflicts."
+    "At each step try to make a move that reduces conflicts or make a random move then try in next step."
+    "Return STRICT JSON only with keys: rows (int[n]), halt (0..1), why (string), z (string)."
+    "No extra text or code fences."
+)
+
+
+# ================= LLM client (Ollama Chat) =================
+# This version follows the paper's TRM cycle by passing (x, y, z) and receiving (z', y', halt).
+class TinyLlamaClient:
+    def __init__(self, model: str = MODEL_NAME, url: str = OLLAMA_URL, temperature: float = TEMPERATURE,
+                 http: Optional[OllamaClient] = None, system: str = SYSTEM_PROMPT):
+        self.model = model
+        self.url = url.rstrip("/")
+        self.temperature = temperature
+        self.system = system
+        self.http = http or OllamaClient(
+            self.url, timeout=TIMEOUT_S, max_connections=MAX_CONNECTIONS,
+            max_concurrency=MAX_CONCURRENCY, mode=CLIENT_MODE,
+        )
+
+    async def close(self):
+        await self.http.close()
+
+    def _extract_json(self, text: str) -> dict:
+        text = text.strip()
+        if text.startswith("```"):
+            text = text.strip("`")
+        start = text.find("{")
+        end = text.rfind("}")
+        if start != -1 and end != -1 and end > start:
+            text = text[start:end+1]
+        return json.loads(text)
+
+    def _validate_rows(self, rows, n: int):
+        if not isinstance(rows, list) or len(rows) != n:
+            raise RuntimeError(f"rows must be length {n}")
+        for r in rows:
+            if not isinstance(r, int) or r < 0 or r >= n:
+                raise RuntimeError(f"invalid row {r}")
+
+    async def _request(self, endpoint: str, payload: dict, key: dict, n: int) -> dict:
+        if not STREAMING:
+            return await self.http.post(endpoint, payload, key=key)
+        parser = RowsStreamParser(n, max_chars=MAX_RESPONSE_CHARS + 4 * n)
+        return await self.http.post_stream(endpoint, payload, parser.feed, key=key)
+
+    async def improve(self, n: int, x_rows: List[int], y_rows: List[int], z_text: str, step: int) -> Tuple[List[int], float, str, str]:
+        """TRM-style call: give (x, y, z) and get (y', z', halt, why).
+        Returns (rows, halt, why, z_new).
+        """
+        system = self.system
+        user = {
+            "n": n,
+            "step": step,
+            "x": x_rows,
+            "y": y_rows,
+            "z": z_text,
+            "rule": "No two queens share a row or diagonal.",
+            "request": "First update z to summarize constraints and conflicts, then update y to reduce conflicts."
+        }
+        # cache identity: everything that shapes the answer, but not the step counter
+        key = {"model": self.model, "temperature": self.temperature, "system": system,
+               "n": n, "x": x_rows, "y": y_rows, "z": z_text}
+        # try /chat then fallback /generate
+        payload_chat = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "format": "json",
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": json.dumps(user)},
+            ],
+            "stream": False,
+        }
+        try:
+            data = await self._request("chat", payload_chat, key, n)
+            content = data.get("message", {}).get("content", "")
+            parsed = self._extract_json(content)
+        except StreamAborted:
+            # the answer was provably invalid; retrying on /generate would waste another call
+            raise
+        except Exception:
+            prompt = system + "" + json.dumps(user)
+            payload_gen = {
+                "model": self.model,
+                "temperature": min(self.temperature, 0.3),
+                "format": "json",
+                "prompt": prompt,
+                "stream": False,
+            }
+            data = await self._request("generate", payload_gen, key, n)
+            content = data.get("response", "")
+            parsed = self._extract_json(content)
+
+        rows = parsed.get("rows")
+        halt = float(parsed.get("halt", 0.0))
+        why = str(parsed.get("why", ""))
+        z_new = str(parsed.get("z", ""))
+        self._validate_rows(rows, n)
+        return rows, halt, why, z_new
+
+
+# ================= Proposers =================
+def make_proposer(backend: str, n: int, k: int = 1, cache: Optional[ResponseCache] = None, seed: int = 0,
+                  model: str = MODEL_NAME, url: str = OLLAMA_URL, temperature: float = TEMPERATURE,
+                  system: str = SYSTEM_PROMPT) -> Proposer:
+    """k proposers for `backend` ("llm" or "minconf"), behind a SpeculativeProposer if k > 1.
+    LLM variant i samples at temperature + i * TEMPERATURE_SPREAD; minconf variant i uses seed + i."""
+    if backend == "llm":
+        # one pooled HTTP client shared by all speculative variants
+        http = OllamaClient(url, timeout=TIMEOUT_S, max_connections=MAX_CONNECTIONS,
+                            max_concurrency=MAX_CONCURRENCY, mode=CLIENT_MODE, cache=cache)
+        candidates = [
+            LLMProposer(TinyLlamaClient(model, url, temperature + i * TEMPERATURE_SPREAD, http=http, system=system))
+            for i in range(k)
+        ]
+    elif backend == "minconf":
+        candidates = [MinConflictsProposer(n, seed=seed + i) for i in range(k)]
+    else:
+        raise ValueError(f"unknown backend {backend!r}")
+    if k == 1:
+        return candidates[0]
+    return SpeculativeProposer(candidates, max_inflight=MAX_CONCURRENCY)
@@ -4,7 +4,7 @@
 # Queen agents only apply rows and ACK. No PyTorch model here.
 #
 # Requirements:
-#   pip install mango-agents requests
+#   pip install mango-agents aiohttp   (or requests, see CLIENT_MODE)
 #   Install and run a local LLM server, e.g. Ollama with a TinyLlama-ish model:
 #     - ollama pull tinyllama:latest   # or any 1B-3B instruct-capable model
 #     - ollama serve                   # listens on http://localhost:11434
@@ -16,30 +16,29 @@ import asyncio
 import json
 from typing import List, Optional, Tuple
 
-import requests
 import mango
 
+from board_protocol import QueenAgent
+from coordinator import StepCoordinator
+from ollama_client import OllamaClient
+from proposers import LLMProposer
+
 
 # ================= Config =================
 N = 8                       # board size
 OUTER_STEPS = 16            # max refinement rounds
 MODEL_NAME = "tinyllama"    # Ollama model tag (adjust as installed)
-OLLAMA_URL = "http://localhost:11434/api/chat"
+OLLAMA_URL = "http://localhost:11434/api"
 TIMEOUT_S = 60
+ACK_TIMEOUT_S = 5.0         # resend MOVE to queens that have not ACKed by then
+ACK_RETRIES = 3
 TEMPERATURE = 0.2
+CLIENT_MODE = "async"       # "async" (aiohttp pool) or "thread" (requests in a thread pool)
+MAX_CONNECTIONS = 4         # keep-alive connections to the LLM server
+MAX_CONCURRENCY = 2         # LLM requests in flight at the same time
 
 # ================= Helpers =================
 
-def conflicts(rows: List[int]) -> int:
-    bad = 0
-    for i in range(len(rows)):
-        for j in range(i + 1, len(rows)):
-            ri, rj = rows[i], rows[j]
-            if ri == rj or abs(ri - rj) == abs(i - j):
-                bad += 1
-    return bad
-
-
 def is_valid_rows(rows: List[int], n: int) -> bool:
     if len(rows) != n:
         return False
@@ -51,12 +50,20 @@ def is_valid_rows(rows: List[int], n: int) -> bool:
 
 # ================= LLM client (Ollama Chat) =================
 class TinyLlamaClient:
-    def __init__(self, model: str = MODEL_NAME, url: str = OLLAMA_URL, temperature: float = TEMPERATURE):
+    def __init__(self, model: str = MODEL_NAME, url: str = OLLAMA_URL, temperature: float = TEMPERATURE,
+                 http: Optional[OllamaClient] = None):
         self.model = model
         self.url = url
         self.temperature = temperature
+        self.http = http or OllamaClient(
+            url, timeout=TIMEOUT_S, max_connections=MAX_CONNECTIONS,
+            max_concurrency=MAX_CONCURRENCY, mode=CLIENT_MODE,
+        )
 
-    def propose_rows(self, n: int, prev_rows: Optional[List[int]], step: int) -> Tuple[List[int], float, str]:
+    async def close(self):
+        await self.http.close()
+
+    async def propose_rows(self, n: int, prev_rows: Optional[List[int]], step: int) -> Tuple[List[int], float, str]:
         """Ask the LLM to return a better full-board assignment.
         Returns (rows, halt_prob, rationale). If parsing fails, raises Exception.
         """
@@ -82,9 +89,7 @@ class TinyLlamaClient:
             ],
             "stream": False,
         }
-        resp = requests.post(self.url, json=payload, timeout=TIMEOUT_S)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await self.http.post("chat", payload)
         content = data.get("message", {}).get("content", "")
         # Some models may add backticks; try to locate JSON
         content_str = content.strip()
@@ -101,77 +106,17 @@ class TinyLlamaClient:
             raise RuntimeError(f"Invalid rows {rows}")
         return rows, halt, why
 
-
-# ================= Mango agents =================
-class QueenAgent(mango.Agent):
-    def __init__(self, col_idx: int):
-        super().__init__()
-        self.col = col_idx
-        self.row: Optional[int] = None
-
-    def handle_message(self, content, meta):
-        t = content.get("type")
-        if t == "SET_ROWS":
-            rows = content["rows"]
-            self.row = int(rows[self.col])
-            self.schedule_instant_message({"type": "ACK", "col": self.col, "row": self.row}, mango.sender_addr(meta))
+    async def improve(self, n: int, x_rows: List[int], y_rows: List[int], z_text: str, step: int) -> Tuple[List[int], float, str, str]:
+        """Proposer interface (proposers.LLMProposer): refines y from the board alone, z is kept."""
+        rows, halt, why = await self.propose_rows(n, y_rows, step)
+        return rows, halt, why, z_text
 
 
-class Coordinator(mango.Agent):
+# ================= Mango agents =================
+class Coordinator(StepCoordinator):
     def __init__(self, n: int, client: TinyLlamaClient):
-        super().__init__()
-        self.n = n
+        super().__init__(n, LLMProposer(client), OUTER_STEPS, ack_timeout=ACK_TIMEOUT_S, ack_retries=ACK_RETRIES)
         self.client = client
-        self.rows: List[int] = [i % n for i in range(n)]  # simple init
-        self.await_acks = asyncio.Event()
-        self.acks = 0
-
-    def on_ready(self):
-        self.schedule_instant_message({"type": "SOLVE", "step": 0}, self.addr)
-
-    def handle_message(self, content, meta):
-        t = content.get("type")
-        if t == "SOLVE":
-            step = content.get("step", 0)
-            asyncio.create_task(self._outer_step(step))
-        elif t == "ACK":
-            self.acks += 1
-            if self.acks == self.n:
-                self.await_acks.set()
-
-    async def _broadcast_rows_and_wait(self, rows_int: List[int], step: int):
-        self.acks = 0
-        self.await_acks.clear()
-        for nb in self.neighbors():
-            self.schedule_instant_message({"type": "SET_ROWS", "rows": rows_int, "step": step}, nb)
-        await self.await_acks.wait()
-
-    async def _outer_step(self, step: int):
-        old_conf = conflicts(self.rows)
-        try:
-            new_rows, halt_prob, why = self.client.propose_rows(self.n, self.rows, step)
-        except Exception as e:
-            print(f"[Coordinator] LLM error at step {step}: {e}. Retrying with same rows.")
-            new_rows, halt_prob, why = self.rows, 0.0, "retry fallback"
-
-        new_conf = conflicts(new_rows)
-        improved = new_conf <= old_conf
-        # Commit if improved or allow neutral moves early on
-        if improved or step < 2:
-            self.rows = new_rows
-        else:
-            # keep old if worse
-            halt_prob *= 0.5
-
-        await self._broadcast_rows_and_wait(self.rows, step)
-
-        c = conflicts(self.rows)
-        print(f"[Coordinator] step {step}: conflicts {old_conf} -> {c}, halt={halt_prob:.2f}, why={why[:80]}")
-
-        if c == 0 or halt_prob > 0.9 or step + 1 >= OUTER_STEPS:
-            print("[Coordinator] Done.")
-            return
-        self.schedule_instant_message({"type": "SOLVE", "step": step + 1}, self.addr)
 
 
 # ================= Topology and runtime =================
@@ -186,9 +131,12 @@ async def main():
         for nq in nodes_q:
             topo.add_edge(node_c, nq)
 
-    async with mango.run_with_tcp(1, coord, *queens):
-        # Let coordinator drive; wait enough time
-        await asyncio.sleep(60)
+    try:
+        async with mango.run_with_tcp(1, coord, *queens):
+            # Let coordinator drive; wait enough time
+            await asyncio.sleep(60)
+    finally:
+        await client.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+# min_conflicts.py
+# Classical local-search backend for the n-Queens coordinators.
+# The board is kept as a permutation (one queen per row and per column), so only diagonal
+# conflicts remain. A randomized greedy pass places almost every queen conflict-free in O(n)
+# (Sosic & Gu, QS4), then a min-conflicts repair swaps conflicted queens with sampled
+# partners. A short tabu list lets the search take sideways moves without undoing them.
+#
+# Usage:
+#   solver = MinConflictsSolver(n, seed=0)
+#   rows = solver.solve()                    # or solver.step(budget) for bounded work
+#   solver.total                             # remaining pairwise conflicts
+
+import random
+from typing import Dict, List, Optional, Sequence
+
+from conflict_index import ConflictIndex
+
+# ================= Config =================
+GREEDY_TAIL = 32        # last columns placed without searching (repaired afterwards)
+GREEDY_TRIES = 64       # random partners tried per column during the greedy pass
+SWAP_SAMPLES = 48       # partners sampled per repair move
+TABU_TENURE = 8         # repair moves a swapped column stays frozen
+
+
+class MinConflictsSolver:
+    def __init__(self, n: int, seed: Optional[int] = None):
+        self.n = n
+        self.rng = random.Random(seed)
+        self.index: Optional[ConflictIndex] = None
+        self.moves = 0
+        self._suspects: List[int] = []
+        self._tabu: Dict[int, int] = {}
+        self._synced: Optional[List[int]] = None   # board of the last sync()
+
+    @property
+    def rows(self) -> List[int]:
+        return self.index.rows
+
+    @property
+    def total(self) -> int:
+        return self.index.total
+
+    # ---------- initialisation ----------
+    def reset(self):
+        """Randomized greedy permutation: O(n), leaves conflicts only in a short tail."""
+        n = self.n
+        rnd = self.rng.random
+        rows = list(range(n))      # partners are drawn at random, no shuffle needed
+        diag = [0] * max(1, 2 * n - 1)
+        anti = [0] * max(1, 2 * n - 1)
+        suspects = []
+        search_upto = max(0, n - GREEDY_TAIL)
+        for c in range(n):
+            if c < search_upto:
+                span = n - c
+                for _ in range(GREEDY_TRIES):
+                    j = c + int(rnd() * span)
+                    r = rows[j]
+                    if diag[r - c + n - 1] == 0 and anti[r + c] == 0:
+                        rows[c], rows[j] = r, rows[c]
+                        break
+                else:
+                    suspects.append(c)
+            else:
+                suspects.append(c)
+            r = rows[c]
+            diag[r - c + n - 1] += 1
+            anti[r + c] += 1
+        self.index = ConflictIndex.from_counts(rows, [1] * n, diag, anti)
+        self._suspects = suspects
+        self._tabu = {}
+        self.moves = 0
+
+    def sync(self, rows: Sequence[int]):
+        """Continue from an external board if it is a permutation, otherwise start over.
+        Syncing to the same board as last time (the caller rejected our proposal and kept its
+        board) keeps the search where it is, tabu list included: an escape from a local
+        minimum can then take more uphill moves than fit in one step."""
+        n = self.n
+        rows = list(rows)
+        if rows == self._synced:
+            return
+        self._synced = rows
+        if len(rows) == n and sorted(rows) == list(range(n)):
+            if self.index is None:
+                self.index = ConflictIndex(rows)
+            elif self.index.rows != list(rows):
+                self.index.assign(rows)
+            else:
+                return
+            self._suspects = []
+            self._tabu = {}
+        else:
+            self.reset()
+
+    # ---------- repair ----------
+    def _swap(self, i: int, j: int):
+        ri, rj = self.index.rows[i], self.index.rows[j]
+        self.index.move(i, rj)
+        self.index.move(j, ri)
+
+    def _next_conflicted(self) -> Optional[int]:
+        idx = self.index
+        while self._suspects:
+            c = self._suspects.pop()
+            if idx.queen_conflicts(c) > 0:
+                return c
+        # suspects exhausted but conflicts remain: rescan once, O(n)
+        self._suspects = [c for c in range(self.n) if idx.queen_conflicts(c) > 0]
+        self.rng.shuffle(self._suspects)
+        return self._suspects.pop() if self._suspects else None
+
+    def step(self, budget: int) -> int:
+        """Run at most `budget` repair moves. Returns the remaining conflicts."""
+        if self.index is None:
+            self.reset()
+        idx = self.index
+        n = self.n
+        rnd = self.rng.random
+        for _ in range(budget):
+            if idx.total == 0 or n < 2:
+                break
+            i = self._next_conflicted()
+            if i is None:
+                break
+            self.moves += 1
+            before = idx.total
+            best_delta, best_j = None, -1
+            for _ in range(SWAP_SAMPLES):
+                j = int(rnd() * n)
+                if j == i or self._tabu.get(j, 0) > self.moves:
+                    continue
+                self._swap(i, j)
+                delta = idx.total - before
+                self._swap(i, j)
+                if best_delta is None or delta < best_delta:
+                    best_delta, best_j = delta, j
+                    if before + delta == 0:
+                        break
+            if best_j < 0:
+                self._suspects.append(i)
+                continue
+            self._swap(i, best_j)
+            if best_delta >= 0:
+                # sideways/uphill escape: freeze both columns so the move is not undone
+                self._tabu[i] = self._tabu[best_j] = self.moves + TABU_TENURE
+            self._suspects.append(best_j)
+            if idx.queen_conflicts(i) > 0:
+                self._suspects.append(i)
+        return idx.total
+
+    def solve(self, max_moves: Optional[int] = None) -> List[int]:
+        """Repair until conflict-free (or `max_moves` is exhausted) and return the rows."""
+        if self.index is None:
+            self.reset()
+        budget = max_moves if max_moves is not None else 50 * self.n + 1000
+        self.step(budget)
+        return list(self.index.rows)
@@ -0,0 +1,177 @@
+# model_service.py
+# One shared model backend for many Coordinators in the same process.
+# Coordinators submit proposal requests through QueuedProposer. The service keeps one
+# queue per instance, waits a short window to let requests pile up, then takes up to
+# MAX_BATCH of them round-robin across instances (so a busy instance cannot starve the
+# others) and runs them as one micro-batch on the backend.
+#
+# Backends:
+#   MinConflictsBatchBackend  - classical engine, one worker-thread call per batch
+#   ProposerBatchBackend      - any Proposer (e.g. LLMProposer), batch fanned out concurrently
+#
+# Usage:
+#   service = ModelService(MinConflictsBatchBackend())
+#   task = asyncio.create_task(service.run())
+#   proposer = QueuedProposer(service, instance_id)      # give one to each Coordinator
+#   ...
+#   await service.stop()
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Union
+
+from proposers import MinConflictsProposer, Proposal, Proposer
+
+# ================= Config =================
+MAX_BATCH = 32            # requests per micro-batch
+BATCH_WINDOW_S = 0.005    # how long the dispatcher waits for a batch to fill
+
+
+@dataclass
+class ProposalRequest:
+    instance: int
+    n: int
+    x_rows: List[int]
+    y_rows: List[int]
+    z_text: str
+    step: int
+
+
+class MinConflictsBatchBackend:
+    """Keeps one min-conflicts solver per instance and runs a whole batch in one thread call."""
+    name = "minconf"
+
+    def __init__(self, seed: int = 0, moves_per_step: int = 1000):
+        self.seed = seed
+        self.moves_per_step = moves_per_step
+        self._solvers: Dict[int, MinConflictsProposer] = {}
+
+    def _run(self, batch: List[ProposalRequest]) -> List[Union[Proposal, Exception]]:
+        out: List[Union[Proposal, Exception]] = []
+        for req in batch:
+            solver = self._solvers.get(req.instance)
+            if solver is None:
+                solver = MinConflictsProposer(req.n, seed=self.seed + req.instance, moves_per_step=self.moves_per_step)
+                self._solvers[req.instance] = solver
+            try:
+                out.append(solver.propose_sync(req.y_rows, req.z_text))
+            except Exception as e:
+                out.append(e)
+        return out
+
+    async def run_batch(self, batch: List[ProposalRequest]) -> List[Union[Proposal, Exception]]:
+        return await asyncio.to_thread(self._run, batch)
+
+    def forget(self, instance: int):
+        self._solvers.pop(instance, None)
+
+    async def close(self):
+        self._solvers.clear()
+
+
+class ProposerBatchBackend:
+    """Fans a batch out to one shared Proposer (e.g. LLMProposer over a pooled client)."""
+    def __init__(self, proposer: Proposer):
+        self.proposer = proposer
+        self.name = proposer.name
+
+    async def run_batch(self, batch: List[ProposalRequest]) -> List[Union[Proposal, Exception]]:
+        return await asyncio.gather(
+            *(self.proposer.propose(r.n, r.x_rows, r.y_rows, r.z_text, r.step) for r in batch),
+            return_exceptions=True,
+        )
+
+    def forget(self, instance: int):
+        pass
+
+    async def close(self):
+        await self.proposer.close()
+
+
+class ModelService:
+    def __init__(self, backend, max_batch: int = MAX_BATCH, window_s: float = BATCH_WINDOW_S):
+        self.backend = backend
+        self.max_batch = max(1, max_batch)
+        self.window_s = window_s
+        self._queues: Dict[int, Deque] = {}
+        self._ready: Deque[int] = deque()      # round-robin order of instances with work
+        self._wake = asyncio.Event()
+        self._running = False
+        # stats
+        self.batches = 0
+        self.requests = 0
+        self.max_seen_batch = 0
+
+    async def submit(self, req: ProposalRequest) -> Proposal:
+        fut = asyncio.get_running_loop().create_future()
+        q = self._queues.setdefault(req.instance, deque())
+        if not q:
+            self._ready.append(req.instance)
+        q.append((req, fut))
+        self._wake.set()
+        return await fut
+
+    def _take_fair(self) -> list:
+        batch = []
+        while self._ready and len(batch) < self.max_batch:
+            inst = self._ready.popleft()
+            q = self._queues[inst]
+            batch.append(q.popleft())
+            if q:
+                self._ready.append(inst)       # back of the line
+        return batch
+
+    async def run(self):
+        """Dispatcher loop; run it as a task for the lifetime of the service."""
+        self._running = True
+        while self._running:
+            await self._wake.wait()
+            if self.window_s > 0:
+                await asyncio.sleep(self.window_s)
+            batch = self._take_fair()
+            if not self._ready:
+                self._wake.clear()
+            if not batch:
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            self.max_seen_batch = max(self.max_seen_batch, len(batch))
+            try:
+                results = await self.backend.run_batch([req for req, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, fut), res in zip(batch, results):
+                if fut.done():
+                    continue
+                if isinstance(res, BaseException):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "max_batch": self.max_seen_batch,
+        }
+
+    async def stop(self):
+        self._running = False
+        self._wake.set()
+        await self.backend.close()
+
+
+class QueuedProposer(Proposer):
+    """Proposer handed to each Coordinator; forwards requests to the shared service."""
+    def __init__(self, service: ModelService, instance: int):
+        self.service = service
+        self.instance = instance
+        self.name = f"queued-{service.backend.name}"
+
+    async def propose(self, n, x_rows, y_rows, z_text, step):
+        return await self.service.submit(ProposalRequest(self.instance, n, list(x_rows), list(y_rows), z_text, step))
+
+    async def close(self):
+        self.service.backend.forget(self.instance)
@@ -1,38 +1,70 @@
 # nqueens_visualizer_agent.py
 # A plug‑in VisualizerAgent for your n‑Queens Mango projects.
 # It listens for {type:"SET_ROWS", rows:[...], step:int} and renders a PNG frame per step.
+# With the delta protocol (board_protocol.py) it joins as a viewer, keeps its own copy of
+# the board from SYNC_BOARD and applies each DELTA before rendering.
 #
 # Usage (example):
 #   from nqueens_visualizer_agent import VisualizerAgent
 #   vis = VisualizerAgent(board_size=N, out_dir="frames_llm")
 #   ... add vis as a node in your mango topology and connect coordinator -> visualizer
-#   The coordinator can reuse the same SET_ROWS broadcast it sends to queens.
+#   The coordinator can reuse the same SET_ROWS broadcast it sends to queens, or send
+#   SYNC_BOARD/DELTA messages via board_protocol.BoardBroadcaster.
+#
+# Frames are rendered in a process pool (render_pool.py) so matplotlib never runs on the
+# event loop; `policy` picks what happens when rendering falls behind ("block", "drop" or
+# "latest", see RenderPool). wait_done() flushes the queued frames before returning.
+# `mode` picks the renderer from board_render.RENDERERS: "persistent" (default) reuses one
+# figure per worker and only redraws the queens; "classic" builds a new figure per frame;
+# "raster" paints the board with NumPy (fastest, and the only one usable for n in the thousands).
+# With animation_path="run.gif" (or .mp4) no PNGs are written: frames go straight from
+# memory into a streaming encoder (frame_writer.py), repeated boards become longer frames.
 #
 # Requirements:
 #   pip install matplotlib
 
 import os
 import asyncio
-from typing import List
-
-import matplotlib
-matplotlib.use("Agg")  # headless rendering
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle
+from typing import List, Optional
 
 import mango
+import numpy as np
+
+from board_protocol import unpack_rows
+from board_render import RENDERERS
+from frame_writer import StreamingGifWriter, close_stream, render_to_stream
+from render_pool import RENDER_POLICY, RENDER_QUEUE, RENDER_WORKERS, RenderPool
 
 
 class VisualizerAgent(mango.Agent):
-    def __init__(self, board_size: int, out_dir: str = "frames", annotate_conflicts: bool = True):
+    def __init__(self, board_size: int, out_dir: str = "frames", annotate_conflicts: bool = True,
+                 workers: int = RENDER_WORKERS, max_pending: int = RENDER_QUEUE, policy: str = RENDER_POLICY,
+                 mode: str = "persistent", animation_path: Optional[str] = None, fps: float = 2):
         super().__init__()
         self.n = board_size
         self.out_dir = out_dir
         self.annotate_conflicts = annotate_conflicts
         self.last_step = -1
-        os.makedirs(self.out_dir, exist_ok=True)
+        self.rows: Optional[List[int]] = None    # board copy kept in sync by SYNC_BOARD/DELTA
+        self.version = -1
+        self.mode = mode
+        self.animation_path = animation_path
+        self.fps = fps
+        if animation_path is None:
+            os.makedirs(self.out_dir, exist_ok=True)
+            self.pool = RenderPool(RENDERERS[mode], workers=workers, max_pending=max_pending, policy=policy)
+        else:
+            # one worker owns the encoder, so frames reach it in order
+            self.pool = RenderPool(render_to_stream, workers=1, max_pending=max_pending, policy=policy)
         self._done = asyncio.Event()
 
+    def on_ready(self):
+        self._join()
+
+    def _join(self):
+        for nb in self.neighbors():
+            self.schedule_instant_message({"type": "HELLO", "role": "viewer"}, nb)
+
     def handle_message(self, content, meta):
         t = content.get("type")
         if t == "SET_ROWS":
@@ -40,6 +72,27 @@ class VisualizerAgent(mango.Agent):
             step = int(content.get("step", 0))
             self.last_step = step
             self._render_frame(rows, step)
+        elif t == "SYNC_BOARD":
+            version = int(content["version"])
+            if version > self.version:
+                self.rows = unpack_rows(content["rows"])
+                self.version = version
+                self.last_step = int(content.get("step", 0))
+                self._render_frame(self.rows, self.last_step)
+        elif t == "DELTA":
+            version = int(content["version"])
+            if version <= self.version:
+                return
+            if self.rows is None or version != self.version + 1:
+                # missed an update: ask for a full resync
+                self._join()
+                return
+            moves = content["moves"]
+            for i in range(0, len(moves), 2):
+                self.rows[moves[i]] = moves[i + 1]
+            self.version = version
+            self.last_step = int(content.get("step", 0))
+            self._render_frame(self.rows, self.last_step)
         elif t == "DONE":
             self._done.set()
 
@@ -51,62 +104,45 @@ class VisualizerAgent(mango.Agent):
                 pass
         else:
             await self._done.wait()
+        await self.close()
 
     # ---------- Rendering ----------
     def _render_frame(self, rows: List[int], step: int):
-        fig, ax = plt.subplots(figsize=(5, 5))
-        ax.set_xlim(0, self.n)
-        ax.set_ylim(0, self.n)
-        ax.set_xticks(range(self.n))
-        ax.set_yticks(range(self.n))
-        ax.set_aspect('equal')
-        ax.grid(True, which='both')
-        ax.invert_yaxis()
-        ax.set_title(f"n-Queens step {step}")
-
-        # draw board squares
-        for i in range(self.n):
-            for j in range(self.n):
-                if (i + j) % 2 == 0:
-                    # leave default background for one color
-                    pass
-                else:
-                    ax.add_patch(Rectangle((i, j), 1, 1, alpha=0.1))
-
-        # draw queens and optional conflict markers
-        conflicts = 0
-        for c, r in enumerate(rows):
-            ax.text(c + 0.5, r + 0.6, "♛", ha='center', va='center', fontsize=18)
-        # compute conflicts for annotation
-        if self.annotate_conflicts:
-            for i in range(self.n):
-                for j in range(i + 1, self.n):
-                    if rows[i] == rows[j] or abs(rows[i] - rows[j]) == abs(i - j):
-                        conflicts += 1
-            ax.text(0.02, 0.98, f"conflicts: {conflicts}", transform=ax.transAxes, va='top')
+        # copy: self.rows keeps changing while the frame waits in the pool queue
+        if self.animation_path is None:
+            self.pool.submit(self.n, list(rows), step, self.out_dir, self.annotate_conflicts)
+        else:
+            self.pool.submit(self.n, list(rows), step, self.animation_path, self.fps, self.annotate_conflicts,
+                             self.mode)
 
-        frame_path = os.path.join(self.out_dir, f"step_{step:03d}.png")
-        plt.tight_layout()
-        fig.savefig(frame_path, dpi=140)
-        plt.close(fig)
-        print(f"[Visualizer] wrote {frame_path}")
+    async def close(self):
+        """Finish the queued frames and stop the render workers."""
+        if self.animation_path is not None:
+            info = await self.pool.run(close_stream, self.animation_path)
+            if info is not None:
+                print(f"[Visualizer] animation saved to {info['path']} "
+                      f"({info['frames_in']} boards, {info['frames_out']} frames)")
+        await self.pool.close()
+        print(f"[Visualizer] frames: {self.pool.stats()}")
 
 
 # ---------- Convenience: simple stitch to GIF (optional) ----------
-# Call from your script after run ends if you have imageio installed.
+# Call from your script after run ends if you rendered PNG frames (no animation_path).
 
 def make_gif(out_dir: str, gif_path: str, fps: int = 2):
     try:
-        import imageio
+        from PIL import Image
     except ImportError:
-        print("imageio not installed; skipping GIF export.")
+        print("Pillow not installed; skipping GIF export.")
         return
-    frames = []
     files = sorted([f for f in os.listdir(out_dir) if f.endswith('.png')])
-    for f in files:
-        frames.append(imageio.v2.imread(os.path.join(out_dir, f)))
-    if frames:
-        imageio.mimsave(gif_path, frames, fps=fps)
-        print(f"[Visualizer] GIF saved to {gif_path}")
-    else:
+    if not files:
         print("[Visualizer] no frames found; GIF not created.")
+        return
+    # one decoded frame at a time, straight into the streaming writer
+    writer = StreamingGifWriter(gif_path, fps=fps)
+    for f in files:
+        with Image.open(os.path.join(out_dir, f)) as img:
+            writer.append(np.asarray(img.convert("RGB")))
+    writer.close()
+    print(f"[Visualizer] GIF saved to {gif_path}")
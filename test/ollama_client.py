@@ -0,0 +1,223 @@
+# ollama_client.py
+# Non-blocking HTTP client for the local Ollama server shared by the n-Queens coordinators.
+# The coordinator awaits it natively, so queens and the visualizer keep handling
+# messages on the mango event loop while a proposal is in flight.
+#
+# Two modes:
+#   "async"  - aiohttp session with a persistent keep-alive connection pool (default)
+#   "thread" - requests.Session in a small thread pool, for setups without aiohttp
+# Both modes cap the number of requests in flight with MAX_CONCURRENCY. An optional
+# ResponseCache (llm_cache.py) answers repeated requests without touching the server; only
+# deterministic ones (temperature 0) are cached, sampled requests always reach the model.
+# post_stream() reads Ollama's NDJSON stream and hands each text piece to a callback that
+# may raise to abort; the connection is then dropped so the server stops generating.
+#
+# Requirements:
+#   pip install aiohttp     # async mode
+#   pip install requests    # thread mode (also used as fallback when aiohttp is missing)
+#
+# Usage:
+#   http = OllamaClient("http://localhost:11434/api")
+#   data = await http.post("chat", payload)
+#   data = await http.post("chat", payload, key={...})   # cache on a custom request identity
+#   data = await http.post_stream("chat", payload, parser.feed)
+#   await http.close()
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from llm_cache import ResponseCache, cache_key
+
+# ================= Config =================
+OLLAMA_URL = "http://localhost:11434/api"
+TIMEOUT_S = 60
+MAX_CONNECTIONS = 4        # keep-alive pool size
+MAX_CONCURRENCY = 2        # requests in flight at the same time
+KEEPALIVE_S = 120          # idle time before a pooled connection is dropped
+
+
+class OllamaClient:
+    def __init__(
+        self,
+        url: str = OLLAMA_URL,
+        timeout: float = TIMEOUT_S,
+        max_connections: int = MAX_CONNECTIONS,
+        max_concurrency: int = MAX_CONCURRENCY,
+        mode: str = "async",
+        cache: Optional[ResponseCache] = None,
+    ):
+        if mode not in ("async", "thread"):
+            raise ValueError(f"unknown client mode {mode!r}")
+        if mode == "async":
+            try:
+                import aiohttp  # noqa: F401
+            except ImportError:
+                print("aiohttp not installed; falling back to thread mode.")
+                mode = "thread"
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.max_connections = max(1, max_connections)
+        self.max_concurrency = max(1, max_concurrency)
+        self.mode = mode
+        self.cache = cache
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._session = None        # aiohttp.ClientSession (async mode)
+        self._http = None           # requests.Session (thread mode)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _cache_key(self, endpoint: str, payload: dict, key) -> Optional[str]:
+        if self.cache is None:
+            return None
+        # a sampled answer is one draw, not the answer: caching it would replay that draw forever
+        if payload.get("temperature") or payload.get("options", {}).get("temperature"):
+            return None
+        return cache_key(endpoint, payload if key is None else key)
+
+    async def post(self, endpoint: str, payload: dict, key=None) -> dict:
+        """POST a JSON payload to `{url}/{endpoint}` and return the decoded JSON body.
+        With a cache attached, `key` (default: the whole payload) identifies the request;
+        requests with a temperature above 0 bypass the cache.
+        """
+        endpoint = endpoint.lstrip("/")
+        ckey = self._cache_key(endpoint, payload, key)
+        if ckey is not None:
+            cached = self.cache.get(ckey)
+            if cached is not None:
+                return cached
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        url = f"{self.url}/{endpoint}"
+        async with self._sem:
+            if self.mode == "async":
+                data = await self._post_async(url, payload)
+            else:
+                data = await self._post_thread(url, payload)
+        if ckey is not None:
+            self.cache.put(ckey, data)
+        return data
+
+    async def post_stream(self, endpoint: str, payload: dict, feed: Callable[[str], None], key=None) -> dict:
+        """Like post(), but with `"stream": true`: every text piece is passed to `feed` as it
+        arrives. If `feed` raises, the response is closed and the exception propagates.
+        Returns a dict shaped like the non-streaming answer ({"message": {"content": ...}}
+        for chat, {"response": ...} for generate) so callers and the cache see one format.
+        """
+        endpoint = endpoint.lstrip("/")
+        ckey = self._cache_key(endpoint, payload, key)
+        if ckey is not None:
+            cached = self.cache.get(ckey)
+            if cached is not None:
+                return cached
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        url = f"{self.url}/{endpoint}"
+        payload = dict(payload, stream=True)
+        async with self._sem:
+            if self.mode == "async":
+                text = await self._stream_async(url, payload, endpoint, feed)
+            else:
+                self._get_http()
+                loop = asyncio.get_running_loop()
+                text = await loop.run_in_executor(self._executor, self._stream_blocking, url, payload, endpoint, feed)
+        data = {"message": {"role": "assistant", "content": text}} if endpoint == "chat" else {"response": text}
+        if ckey is not None:
+            self.cache.put(ckey, data)
+        return data
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self.cache is not None:
+            self.cache.close()
+
+    # ---------- async mode ----------
+    def _get_session(self):
+        if self._session is None:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=KEEPALIVE_S)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def _post_async(self, url: str, payload: dict) -> dict:
+        session = self._get_session()
+        async with session.post(url, json=payload) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def _stream_async(self, url: str, payload: dict, endpoint: str, feed) -> str:
+        session = self._get_session()
+        parts: List[str] = []
+        async with session.post(url, json=payload) as resp:
+            resp.raise_for_status()
+            try:
+                async for line in resp.content:
+                    if _consume_line(line, endpoint, feed, parts):
+                        break
+            except BaseException:
+                resp.close()      # drop the connection: Ollama cancels the generation
+                raise
+        return "".join(parts)
+
+    # ---------- thread mode ----------
+    def _get_http(self):
+        if self._http is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._http = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections)
+            self._http.mount("http://", adapter)
+            self._http.mount("https://", adapter)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="ollama")
+        return self._http
+
+    def _post_blocking(self, url: str, payload: dict) -> dict:
+        resp = self._http.post(url, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _post_thread(self, url: str, payload: dict) -> dict:
+        self._get_http()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._post_blocking, url, payload)
+
+    def _stream_blocking(self, url: str, payload: dict, endpoint: str, feed) -> str:
+        parts: List[str] = []
+        resp = self._http.post(url, json=payload, timeout=self.timeout, stream=True)
+        try:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if _consume_line(line, endpoint, feed, parts):
+                    break
+        finally:
+            resp.close()
+        return "".join(parts)
+
+
+def _consume_line(line: bytes, endpoint: str, feed, parts: List[str]) -> bool:
+    """Handle one NDJSON stream line. Returns True once the server reports done."""
+    line = line.strip()
+    if not line:
+        return False
+    chunk = json.loads(line)
+    if chunk.get("error"):
+        raise RuntimeError(f"Ollama error: {chunk['error']}")
+    if endpoint == "chat":
+        piece = chunk.get("message", {}).get("content", "")
+    else:
+        piece = chunk.get("response", "")
+    if piece:
+        parts.append(piece)
+        feed(piece)
+    return bool(chunk.get("done"))
@@ -1,6 +1,13 @@
 # nqueens_trm_mango_shared_model.py
 # One shared tiny recursive model (TRM-like) used by a Coordinator agent.
 # Queen agents are lightweight and only apply rows they receive.
+# The model (SharedTRM, or ColumnTRM for large boards; see trm_model.py) works on batches:
+# each outer step refines RESTARTS boards in one forward pass under torch.inference_mode
+# and commits the best one. It runs on
+# CUDA when available and on the CPU otherwise.
+# With BACKEND = "served" the model lives in one InferenceAgent (../inference_agent.py) and
+# INSTANCES Coordinators send it INFER messages; their requests are micro-batched into one
+# forward pass in a worker thread, so no Coordinator runs model compute on the event loop.
 #
 # Requirements:
 #   pip install mango-agents torch networkx
@@ -9,179 +16,199 @@
 #   python nqueens_trm_mango_shared_model.py
 
 import asyncio
-from typing import List, Optional
+import os
+import sys
+import zlib
+from typing import Dict, Hashable, List, Optional, Tuple, Union
 
 import torch
-import torch.nn as nn
-import torch.nn.functional as F
 import mango
 
+# shared helpers live one level up in test/, the model next to this file
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from board_protocol import QueenAgent
+from conflict_index import batch_conflicts
+from coordinator import StepCoordinator
+from inference_agent import InferenceAgent, RemoteProposer
+from model_service import ProposalRequest
+from proposers import MinConflictsProposer, Proposal, Proposer
+from trm_model import DEVICE, MODELS, RecursiveModel, load_checkpoint
+
 # ========= Config =========
 N = 8                  # board size
 OUTER_STEPS = 16       # number of outer recursion steps
 INNER_STEPS = 4        # inner latent refinement steps per outer step
 H = 64                 # tiny hidden size
-DEVICE = torch.device("cuda")
-
-print(DEVICE)
-# ========= Utility functions =========
-def conflicts(rows: List[int]) -> int:
-    """Count pairwise conflicts for a full assignment (one row per column)."""
-    bad = 0
-    for i in range(len(rows)):
-        for j in range(i + 1, len(rows)):
-            ri, rj = rows[i], rows[j]
-            if ri == rj or abs(ri - rj) == abs(i - j):
-                bad += 1
-    return bad
-
-
-def project_to_rows(y_logits: torch.Tensor) -> List[int]:
-    """y_logits: [n, n] logits per column. Return argmax row per column."""
-    with torch.no_grad():
-        rows = torch.argmax(y_logits, dim=1).tolist()
-    return [int(r) for r in rows]
-
-
-def encode_board(rows: List[Optional[int]], n: int) -> torch.Tensor:
-    """Encode current partial board as a 2-feature per column vector:
-    - feat[0]: 1.0 if column has a queen set, else 0
-    - feat[1]: normalized row position if set, else 0
-    Output shape: [2*n]
+MODEL = "SharedTRM"    # or "ColumnTRM": weights shared across columns, works for any N (try N = 512)
+BACKEND = "trm"        # "trm" (MODEL), "served" (one MODEL in an InferenceAgent) or "minconf"
+INSTANCES = 1          # independent boards (Coordinator + queens each); "served" batches them together
+RUN_TIMEOUT_S = 60
+SEED = 0               # seed for the classical backend
+ACK_TIMEOUT_S = 5.0    # resend MOVE to queens that have not ACKed by then
+ACK_RETRIES = 3
+RESTARTS = 8           # boards refined side by side in one forward pass; the best one is committed
+CHECKPOINT = None      # e.g. "trm_n8.pt" written by train_trm.py; None = random weights
+HALT_THRESHOLD = 0.9   # a board leaves the inner loop once the halting head reaches this; None = off
+HALT_TOL = 1e-3        # ... or once its latent z stops moving (max abs change); None = off
+
+
+# ========= Proposer =========
+class TRMBatchBackend:
+    """ModelService backend around one recursive model. Keeps y (answer) and z (latent) per instance
+    and runs every request of a micro-batch as one forward pass in a worker thread. Each
+    instance refines `restarts` boards ([B, ...] tensors) and gets back the one with the fewest
+    conflicts; restart 0 starts from uniform logits, the others from seeded noise.
+    The inner loop halts per board (halt_threshold / halt_tol, see RecursiveModel.improve); the
+    model's step and FLOP counters are printed on close.
     """
-    x = torch.zeros(n, 2, dtype=torch.float32, device=DEVICE)
-    for c, r in enumerate(rows):
-        if r is not None:
-            x[c, 0] = 1.0
-            x[c, 1] = float(r) / max(1, n - 1)
-    return x.flatten()
-
+    name = "trm"
 
-# ========= Tiny Recursive Model (shared) =========
-class SharedTRM(nn.Module):
-    """
-    A compact TRM-like module that refines a board assignment recursively.
-    - Inputs per outer step: x (board encoding), y (current logits [n,n]), z (latent [h])
-    - Inner loop: update z a few times using x and y
-    - Answer update: produce new y from z and previous y
-    - Halting head q: scalar in [0,1] suggesting to stop when near solution
-    """
-    def __init__(self, n: int, h: int):
-        super().__init__()
-        self.n = n
-        self.h = h
-        self.enc_x = nn.Linear(2 * n, h)
-        self.enc_y = nn.Linear(n * n, h)
-        self.fz = nn.Sequential(
-            nn.Linear(h + h, h),
-            nn.ReLU(),
-            nn.Linear(h, h),
-        )
-        self.fy = nn.Sequential(
-            nn.Linear(h + h, h),
-            nn.ReLU(),
-            nn.Linear(h, n * n),
-        )
-        self.halt = nn.Sequential(nn.Linear(h, 1), nn.Sigmoid())
-
-    def improve(self, x: torch.Tensor, y_logits: torch.Tensor, z: torch.Tensor, inner_steps: int) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
-        # x: [2n], y_logits: [n,n], z: [h]
-        ex = torch.tanh(self.enc_x(x))
-        ey = torch.tanh(self.enc_y(y_logits.flatten()))
-        # inner latent refinement
-        for _ in range(inner_steps):
-            z = torch.tanh(self.fz(torch.cat([z, ey], dim=0)))
-        # answer update
-        y_new = self.fy(torch.cat([z, ey], dim=0)).view(self.n, self.n)
-        q = self.halt(z).squeeze(0)  # scalar in [0,1]
-        return y_new, z, q
+    def __init__(self, model: RecursiveModel, inner_steps: int = INNER_STEPS, restarts: int = RESTARTS, seed: int = SEED,
+                 halt_threshold: Optional[float] = HALT_THRESHOLD, halt_tol: Optional[float] = HALT_TOL):
+        self.model = model.to(DEVICE).eval()
+        self.inner_steps = inner_steps
+        self.restarts = max(1, restarts)
+        self.seed = seed
+        self.halt_threshold = halt_threshold
+        self.halt_tol = halt_tol
+        self._state: Dict[Hashable, Tuple[torch.Tensor, torch.Tensor]] = {}
+
+    def _initial_state(self, instance: Hashable, n: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        gen = torch.Generator().manual_seed(self.seed + zlib.crc32(str(instance).encode()))
+        y, z = self.model.initial_state(self.restarts, n)
+        # restart 0 keeps the uniform answer, the single-board behaviour
+        y[1:] = torch.randn(y[1:].shape, generator=gen).to(DEVICE)
+        return y, z
+
+    def _run(self, batch: List[ProposalRequest]) -> List[Union[Proposal, Exception]]:
+        k = self.restarts
+        xs, ys, zs, rows = [], [], [], []
+        for req in batch:
+            y, z = self._state.get(req.instance) or self._initial_state(req.instance, req.n)
+            x = self.model.encode([req.x_rows])
+            xs.append(x.expand(k, *x.shape[1:]))
+            ys.append(y)
+            zs.append(z)
+            rows += [req.x_rows] * k
+        with torch.inference_mode():
+            y_all, z_all, q_all = self.model.improve(torch.cat(xs), torch.cat(ys), torch.cat(zs), self.inner_steps,
+                                                     self.halt_threshold, self.halt_tol)
+        steps = self.model.last_steps
+        boards = self.model.decode(y_all, rows)
+        scores = batch_conflicts(boards.numpy())
+        out: List[Union[Proposal, Exception]] = []
+        for i, req in enumerate(batch):
+            lo, hi = i * k, (i + 1) * k
+            self._state[req.instance] = (y_all[lo:hi], z_all[lo:hi])
+            best = lo + int(scores[lo:hi].argmin())
+            why = f"trm best of {k}: {int(scores[best])}" if k > 1 else "trm"
+            why += f" ({int(steps[best])}/{self.inner_steps} inner steps)"
+            out.append((boards[best].tolist(), float(q_all[best]), why, req.z_text))
+        return out
+
+    async def run_batch(self, batch: List[ProposalRequest]) -> List[Union[Proposal, Exception]]:
+        return await asyncio.to_thread(self._run, batch)
+
+    def forget(self, instance: Hashable):
+        self._state.pop(instance, None)
+
+    async def close(self):
+        if self.model.samples:
+            print(f"[Coordinator] model counters: {self.model.counters()}")
+            self.model.reset_counters()
+        self._state.clear()
+
+
+class TRMProposer(Proposer):
+    """Proposer backed by a private model (TRMBatchBackend with a single instance)."""
+    name = "trm"
+
+    def __init__(self, model: RecursiveModel, inner_steps: int = INNER_STEPS, restarts: int = RESTARTS, seed: int = SEED):
+        self.backend = TRMBatchBackend(model, inner_steps, restarts, seed)
+
+    async def propose(self, n, x_rows, y_rows, z_text, step):
+        (result,) = await self.backend.run_batch([ProposalRequest(0, n, x_rows, y_rows, z_text, step)])
+        return result
+
+    async def close(self):
+        await self.backend.close()
 
 
 # ========= Mango agents =========
-class QueenAgent(mango.Agent):
-    def __init__(self, col_idx: int):
-        super().__init__()
-        self.col = col_idx
-        self.row: Optional[int] = None
-
-    def handle_message(self, content, meta):
-        t = content.get("type")
-        if t == "SET_ROWS":
-            rows = content["rows"]  # full assignment list[int]
-            self.row = int(rows[self.col])
-            # acknowledge to coordinator
-            self.schedule_instant_message({"type": "ACK", "col": self.col, "row": self.row}, mango.sender_addr(meta))
-
-
-class Coordinator(mango.Agent):
-    def __init__(self, n: int, model: SharedTRM):
-        super().__init__()
-        self.n = n
-        self.model = model.to(DEVICE).eval()
-        # state
-        self.rows: List[Optional[int]] = [None] * n
-        # start with uniform logits
-        self.y_logits = torch.zeros(n, n, dtype=torch.float32, device=DEVICE)
-        self.z = torch.zeros(H, dtype=torch.float32, device=DEVICE)
-        self.await_acks = asyncio.Event()
-        self.acks = 0
-
-    def on_ready(self):
-        self.schedule_instant_message({"type": "SOLVE", "step": 0}, self.addr)
-
-    def handle_message(self, content, meta):
-        t = content.get("type")
-        if t == "SOLVE":
-            # kick off one outer step via background task
-            step = content.get("step", 0)
-            asyncio.create_task(self._outer_step(step))
-        elif t == "ACK":
-            self.acks += 1
-            if self.acks == self.n:
-                self.await_acks.set()
-
-    async def _broadcast_rows_and_wait(self, rows_int: List[int], step: int):
-        self.acks = 0
-        self.await_acks.clear()
-        for nb in self.neighbors():
-            self.schedule_instant_message({"type": "SET_ROWS", "rows": rows_int, "step": step}, nb)
-        await self.await_acks.wait()
-
-    async def _outer_step(self, step: int):
-        # encode x from current rows (fill Nones with 0 for encoding only)
-        x = encode_board([r if r is not None else 0 for r in self.rows], self.n)
-        with torch.no_grad():
-            self.y_logits, self.z, q = self.model.improve(x, self.y_logits, self.z, INNER_STEPS)
-        rows_int = project_to_rows(self.y_logits)
-        # commit and broadcast
-        self.rows = rows_int  # store as full assignment
-        await self._broadcast_rows_and_wait(rows_int, step)
-
-        c = conflicts(rows_int)
-        print(f"[Coordinator] step {step} rows={rows_int} conflicts={c} halt_prob={float(q):.3f}")
-        if c == 0 or float(q) > 0.9 or step + 1 >= OUTER_STEPS:
-            print("[Coordinator] Done.")
-            return
-        # next step
-        self.schedule_instant_message({"type": "SOLVE", "step": step + 1}, self.addr)
+class Coordinator(StepCoordinator):
+    """The model sees the committed board as x every step and its proposal is always
+    committed: the restarts already return the best board they found."""
+    def __init__(self, n: int, proposer: Proposer):
+        super().__init__(n, proposer, OUTER_STEPS, ack_timeout=ACK_TIMEOUT_S, ack_retries=ACK_RETRIES)
+
+    async def _propose(self, step: int) -> Proposal:
+        self.x_rows = self.y_rows
+        return await super()._propose(step)
+
+    def accept(self, new_rows: List[int], old_conf: int, step: int) -> bool:
+        return True
 
 
 # ========= Topology and runtime =========
+def load_model(n: int) -> Tuple[RecursiveModel, int]:
+    """The shared model and its inner steps: from CHECKPOINT if set, else random weights."""
+    if CHECKPOINT:
+        model, info = load_checkpoint(CHECKPOINT, n)
+        print(f"[Coordinator] loaded {CHECKPOINT}: {info}")
+        return model, info["inner_steps"]
+    return MODELS[MODEL](n, H), INNER_STEPS
+
+
+def make_proposer(backend: str, n: int, server: Optional[InferenceAgent] = None) -> Proposer:
+    if backend == "trm":
+        model, inner_steps = load_model(n)
+        return TRMProposer(model, inner_steps=inner_steps)
+    if backend == "served":
+        return RemoteProposer(server)
+    if backend == "minconf":
+        return MinConflictsProposer(n, seed=SEED)
+    raise ValueError(f"unknown backend {backend!r}")
+
+
 async def main():
-    # Build a star topology: Coordinator connected to all queens
+    print(f"[Coordinator] model device: {DEVICE}")
+    server = None
+    if BACKEND == "served":
+        model, inner_steps = load_model(N)
+        server = InferenceAgent(TRMBatchBackend(model, inner_steps=inner_steps))
+
+    # Build one star topology per instance: Coordinator connected to all its queens
+    coords, agents = [], []
     with mango.create_topology() as topo:
-        model = SharedTRM(N, H)
-        coord = Coordinator(N, model)
-        queens = [QueenAgent(i) for i in range(N)]
-        node_c = topo.add_node(coord)
-        nodes_q = [topo.add_node(q) for q in queens]
-        for nq in nodes_q:
-            topo.add_edge(node_c, nq)
-
-    async with mango.run_with_tcp(1, coord, *queens):
-        # let the coordinator drive the loop; just wait until it prints Done
-        # give plenty of time; terminate when container exits the context
-        await asyncio.sleep(5)
+        for _ in range(INSTANCES):
+            proposer = make_proposer(BACKEND, N, server)
+            coord = Coordinator(N, proposer)
+            if isinstance(proposer, RemoteProposer):
+                proposer.bind(coord)
+            queens = [QueenAgent(i) for i in range(N)]
+            node_c = topo.add_node(coord)
+            nodes_q = [topo.add_node(q) for q in queens]
+            for nq in nodes_q:
+                topo.add_edge(node_c, nq)
+            coords.append(coord)
+            agents += [coord, *queens]
+    if server is not None:
+        agents.append(server)
+
+    try:
+        async with mango.run_with_tcp(1, *agents):
+            # let the coordinators drive the loop until they are all done
+            try:
+                await asyncio.wait_for(asyncio.gather(*(c.finished.wait() for c in coords)), timeout=RUN_TIMEOUT_S)
+            except asyncio.TimeoutError:
+                print(f"[Coordinator] timeout: {sum(c.finished.is_set() for c in coords)}/{len(coords)} finished")
+            for c in coords:
+                await c.proposer.close()
+    finally:
+        if server is not None:
+            await server.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+# train_trm.py
+# Offline trainer for the recursive models in trm_model.py (SharedTRM or ColumnTRM).
+# Worker processes generate supervised trajectories with the classical min-conflicts solver:
+# every board it visits on the way from a random start to a solution becomes a sample, and
+# the solutions found form a pool. A sample's target is the pool solution closest to it in
+# Hamming distance (for small n the pool holds every solution, so the target is a function of
+# the board; the solution one trajectory happens to reach is not, and the model would only
+# learn the average). Training uses deep supervision across outer steps, the same loop
+# the Coordinator runs: x encodes the committed board, y/z are carried over (detached) and
+# the decoded rows of y become the next committed board. A ColumnTRM trained here on N
+# also runs on other board sizes; EVAL_SIZES reports how it transfers. Each outer step is supervised with
+# cross-entropy on the target rows plus BCE on the halting head (target: board solved).
+# Every CKPT_EVERY epochs the model is checkpointed and evaluated on held-out starts.
+#
+# Requirements:
+#   pip install torch numpy
+#
+# Run:
+#   python train_trm.py
+#   then set CHECKPOINT = "trm_n8.pt" in torch_trm.py
+
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+from conflict_index import batch_conflicts
+from min_conflicts import MinConflictsSolver
+from trm_model import DEVICE, MODELS, RecursiveModel, save_checkpoint
+
+# ========= Config =========
+MODEL = "SharedTRM"      # or "ColumnTRM" (weights shared across columns, any board size)
+N = 8                   # board size
+H = 64                  # hidden size
+INNER_STEPS = 4         # latent refinements per outer step
+SUP_STEPS = 4           # supervised outer steps per sample (deep supervision)
+EVAL_OUTER_STEPS = 16   # outer steps allowed on held-out boards (as in the Coordinator)
+TRAJECTORIES = 4000     # solver runs for the training set
+HELDOUT = 256           # held-out random starts
+MAX_MOVES = 200         # repair moves per trajectory
+RANDOM_START = 0.3      # share of starts that are random rows instead of permutations
+WORKERS = os.cpu_count() or 1
+EPOCHS = 20
+BATCH = 256
+LR = 1e-3
+CKPT_PATH = "trm_n8.pt"
+CKPT_EVERY = 5
+HALT_THRESHOLD = 0.9    # adaptive inner loop in the second held-out evaluation (as in torch_trm.py)
+HALT_TOL = 1e-3
+EVAL_SIZES = (16, 32)   # extra held-out board sizes for models that work for any n
+SEED = 0
+
+
+# ========= Data generation (worker processes) =========
+def make_trajectories(n: int, count: int, seed: int) -> Tuple[List[List[int]], List[List[int]]]:
+    """Run `count` min-conflicts solves; return (visited boards, solutions found)."""
+    rng = random.Random(seed)
+    boards, solutions = [], []
+    for _ in range(count):
+        if rng.random() < RANDOM_START:
+            start = [rng.randrange(n) for _ in range(n)]
+        else:
+            start = list(range(n))
+            rng.shuffle(start)
+        solver = MinConflictsSolver(n, seed=rng.randrange(2 ** 31))
+        solver.sync(start)
+        path = [start, list(solver.rows)]
+        for _ in range(MAX_MOVES):
+            if solver.step(1) == 0:
+                break
+            path.append(list(solver.rows))
+        if solver.total != 0:
+            continue
+        solution = list(solver.rows)
+        solutions.append(solution)
+        boards.extend(board for board in path if board != solution)
+    return boards, solutions
+
+
+def nearest_solutions(boards: torch.Tensor, pool: torch.Tensor, chunk: int = 4096) -> torch.Tensor:
+    """For every board [B, n], the pool solution [S, n] with the most rows in common."""
+    out = torch.empty_like(boards)
+    for i in range(0, len(boards), chunk):
+        same = (boards[i:i + chunk, None, :] == pool[None, :, :]).sum(-1)   # [b, S]
+        out[i:i + chunk] = pool[same.argmax(-1)]
+    return out
+
+
+def generate(n: int, trajectories: int, seed: int, workers: int = WORKERS) -> Tuple[torch.Tensor, torch.Tensor]:
+    chunks = max(1, workers * 4)
+    per = [trajectories // chunks + (1 if i < trajectories % chunks else 0) for i in range(chunks)]
+    boards, solutions = [], set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for b, sols in pool.map(make_trajectories, [n] * chunks, per, [seed * 100003 + i for i in range(chunks)]):
+            boards.extend(b)
+            solutions.update(tuple(sol) for sol in sols)
+    boards_t = torch.tensor(boards, dtype=torch.long)
+    pool_t = torch.tensor(sorted(solutions), dtype=torch.long)
+    print(f"[Train] solution pool: {len(pool_t)} distinct solutions")
+    return boards_t, nearest_solutions(boards_t, pool_t)
+
+
+# ========= Training =========
+def train_epoch(model: RecursiveModel, opt: torch.optim.Optimizer, boards: torch.Tensor, targets: torch.Tensor,
+                gen: torch.Generator) -> float:
+    model.train()
+    n = model.n
+    order = torch.randperm(len(boards), generator=gen)
+    total, batches = 0.0, 0
+    for i in range(0, len(order), BATCH):
+        idx = order[i:i + BATCH]
+        rows, tgt = boards[idx], targets[idx].to(DEVICE)
+        y, z = model.initial_state(len(idx), n)
+        for _ in range(SUP_STEPS):
+            y, z, q = model.improve(model.encode(rows), y, z, INNER_STEPS)
+            logits = model.row_logits(y, rows)
+            pred = logits.argmax(-1)
+            solved = torch.from_numpy(batch_conflicts(pred.cpu().numpy()) == 0).float().to(DEVICE)
+            loss = F.cross_entropy(logits.reshape(-1, n), tgt.reshape(-1)) + F.binary_cross_entropy(q, solved)
+            opt.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+            opt.step()
+            # deep supervision: carry the state forward without backpropagating through it
+            y, z = y.detach(), z.detach()
+            rows = pred.detach().cpu()
+            total += loss.item()
+            batches += 1
+    return total / max(1, batches)
+
+
+@torch.inference_mode()
+def evaluate(model: RecursiveModel, starts: torch.Tensor, outer_steps: int = EVAL_OUTER_STEPS,
+             halt_threshold: Optional[float] = None, halt_tol: Optional[float] = None) -> dict:
+    """Run the Coordinator loop on all held-out starts at once; report solve rate, outer steps
+    and the inner steps / FLOPs spent per board per outer step."""
+    model.eval()
+    model.reset_counters()
+    rows = starts.clone()
+    y, z = model.initial_state(len(rows), rows.shape[1])
+    solved_at = torch.full((len(rows),), -1, dtype=torch.long)
+    for step in range(outer_steps):
+        y, z, _ = model.improve(model.encode(rows), y, z, INNER_STEPS, halt_threshold, halt_tol)
+        rows = model.decode(y, rows)
+        newly = torch.from_numpy(batch_conflicts(rows.numpy()) == 0) & (solved_at < 0)
+        solved_at[newly] = step + 1
+    solved = solved_at > 0
+    return {
+        "solve_rate": solved.float().mean().item(),
+        "mean_conflicts": float(batch_conflicts(rows.numpy()).mean()),
+        "mean_steps": solved_at[solved].float().mean().item() if solved.any() else None,
+        "mean_inner_steps": model.counters()["expected_inner_steps"],
+        "flops_per_board": model.counters()["flops_per_sample"],
+    }
+
+
+def main():
+    torch.manual_seed(SEED)
+    t0 = time.perf_counter()
+    boards, targets = generate(N, TRAJECTORIES, SEED)
+    rng = random.Random(SEED + 1)
+    heldout = torch.tensor([rng.sample(range(N), N) for _ in range(HELDOUT)], dtype=torch.long)
+    other_sizes = {n: torch.tensor([rng.sample(range(n), n) for _ in range(HELDOUT)], dtype=torch.long)
+                   for n in (EVAL_SIZES if MODELS[MODEL].any_n else ())}
+    print(f"[Train] {len(boards)} samples from {TRAJECTORIES} trajectories with {WORKERS} workers "
+          f"in {time.perf_counter() - t0:.1f}s, device {DEVICE}")
+
+    model = MODELS[MODEL](N, H).to(DEVICE)
+    opt = torch.optim.AdamW(model.parameters(), lr=LR)
+    gen = torch.Generator().manual_seed(SEED)
+    print(f"[Train] before training: {evaluate(model, heldout)}")
+    for epoch in range(1, EPOCHS + 1):
+        t1 = time.perf_counter()
+        loss = train_epoch(model, opt, boards, targets, gen)
+        print(f"[Train] epoch {epoch}: loss {loss:.4f} ({time.perf_counter() - t1:.1f}s)")
+        if epoch % CKPT_EVERY == 0 or epoch == EPOCHS:
+            metrics = evaluate(model, heldout)
+            save_checkpoint(model, CKPT_PATH, INNER_STEPS, epoch=epoch, **metrics)
+            print(f"[Train] held-out: {metrics}; checkpoint saved to {CKPT_PATH}")
+            print(f"[Train] held-out, adaptive halting: {evaluate(model, heldout, halt_threshold=HALT_THRESHOLD, halt_tol=HALT_TOL)}")
+            for n, starts in other_sizes.items():
+                print(f"[Train] held-out n={n}: {evaluate(model, starts)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+# trm_model.py
+# The recursive models and their board encoding helpers, shared by torch_trm.py (the mango
+# Coordinator) and train_trm.py (the offline trainer), plus the memory-mapped checkpoint format.
+#   SharedTRM   whole-board layers for one fixed n (O(n^2 h) parameters)
+#   ColumnTRM   layers shared across columns; one model for any n, O(n h) activations
+# No mango dependency.
+#
+# Requirements:
+#   pip install torch
+#
+# Measure cold start (N processes loading one checkpoint at once):
+#   python trm_model.py trm_n8.pt 4
+
+import math
+import os
+import time
+from typing import List, Optional
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+# ========= Utility functions =========
+def project_to_rows(y_logits: torch.Tensor) -> List[int]:
+    """y_logits: [n, n] logits per column. Return argmax row per column."""
+    with torch.inference_mode():
+        rows = torch.argmax(y_logits, dim=-1).tolist()
+    return [int(r) for r in rows]
+
+
+def project_batch(y_logits: torch.Tensor) -> torch.Tensor:
+    """y_logits: [B, n, n]. Return argmax rows [B, n] (on CPU, for scoring)."""
+    with torch.inference_mode():
+        return torch.argmax(y_logits, dim=-1).cpu()
+
+
+def encode_board(rows: List[Optional[int]], n: int) -> torch.Tensor:
+    """Encode current partial board as a 2-feature per column vector:
+    - feat[0]: 1.0 if column has a queen set, else 0
+    - feat[1]: normalized row position if set, else 0
+    Output shape: [2*n]
+    """
+    return encode_boards([rows], n)[0]
+
+
+def encode_boards(boards, n: int) -> torch.Tensor:
+    """Batched encode_board: B boards (lists with None for empty, or an int tensor [B, n]) -> [B, 2*n]."""
+    if isinstance(boards, torch.Tensor):
+        r = boards.to(torch.float32)
+    else:
+        r = torch.tensor([[-1 if v is None else v for v in rows] for rows in boards], dtype=torch.float32)
+    x = torch.stack([(r >= 0).float(), r.clamp(min=0) / max(1, n - 1)], dim=-1)
+    return x.flatten(1).to(DEVICE)
+
+
+def board_tensor(boards) -> torch.Tensor:
+    """Boards as a long tensor [B, n] with -1 for empty columns (lists may hold None)."""
+    if isinstance(boards, torch.Tensor):
+        return boards.to(torch.long)
+    return torch.tensor([[-1 if v is None else v for v in rows] for rows in boards], dtype=torch.long)
+
+
+def line_counts(rows: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Queens per row [B, n], per diagonal r-c+n-1 [B, 2n-1] and per anti-diagonal r+c [B, 2n-1]."""
+    b, n = rows.shape
+    occ = (rows >= 0).float()
+    r = rows.clamp(min=0)
+    c = torch.arange(n, device=rows.device).expand(b, n)
+    row = torch.zeros(b, n, device=rows.device).scatter_add_(1, r, occ)
+    diag = torch.zeros(b, 2 * n - 1, device=rows.device).scatter_add_(1, r - c + n - 1, occ)
+    anti = torch.zeros(b, 2 * n - 1, device=rows.device).scatter_add_(1, r + c, occ)
+    return row, diag, anti
+
+
+# ========= Recursive models =========
+class RecursiveModel(nn.Module):
+    """
+    The recursion shared by the TRM variants; subclasses provide the layers.
+    - Inputs per outer step: x = encode(boards), y (current answer), z (latent); improve()
+      takes them with a leading batch dimension or for a single board
+    - Inner loop: update z a few times using x and y (their encodings are summed)
+    - Answer update: produce new y from z and previous y
+    - Halting head q: scalar in [0,1] suggesting to stop when near solution
+    - Adaptive inner loop (optional): a sample leaves the inner loop once q(z) reaches
+      halt_threshold or z moves less than halt_tol (max abs change); only the samples still
+      active are refined, so easy boards cost fewer steps
+    - row_logits(y, boards) [B,n,n] for training, decode(y, boards) -> rows [B,n] on the CPU
+    Counters (calls, samples, inner steps run, approximate FLOPs) accumulate across calls;
+    see counters() and reset_counters().
+    """
+    any_n = False      # True if one set of weights works for every board size
+    x_dims = 1         # dimensions of an unbatched x
+
+    def __init__(self, n: int, h: int):
+        super().__init__()
+        self.n = n
+        self.h = h
+        self.last_steps: Optional[torch.Tensor] = None   # inner steps per sample of the last call
+        self.reset_counters()
+
+    # ----- subclass hooks -----
+    def config(self) -> dict:
+        """Constructor arguments beyond n and h, stored in checkpoints to rebuild the model."""
+        return {}
+
+    def encode(self, boards) -> torch.Tensor:
+        raise NotImplementedError
+
+    def initial_state(self, batch: int, n: int) -> tuple[torch.Tensor, torch.Tensor]:
+        """Uniform answer and zero latent for `batch` boards of size n."""
+        raise NotImplementedError
+
+    def _condition(self, x: torch.Tensor, y: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        """(encoding of x + y for the inner loop, encoding of y for the answer update)."""
+        raise NotImplementedError
+
+    def _inner(self, z: torch.Tensor, exy: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def _answer(self, z: torch.Tensor, ey: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def _halt(self, z: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+    def _flops(self, n: int) -> tuple[int, int, int]:
+        """Multiply-adds x2 per sample: (once per outer step, per inner step, per halting check)."""
+        raise NotImplementedError
+
+    def row_logits(self, y: torch.Tensor, boards) -> torch.Tensor:
+        raise NotImplementedError
+
+    def decode(self, y: torch.Tensor, boards) -> torch.Tensor:
+        """Row per column [B, n] (on CPU, for scoring)."""
+        with torch.inference_mode():
+            return torch.argmax(self.row_logits(y, boards), dim=-1).cpu()
+
+    # ----- recursion -----
+    def improve(self, x: torch.Tensor, y: torch.Tensor, z: torch.Tensor, inner_steps: int,
+                halt_threshold: Optional[float] = None,
+                halt_tol: Optional[float] = None) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        if x.dim() == self.x_dims:
+            y_new, z, q = self.improve(x[None], y[None], z[None], inner_steps, halt_threshold, halt_tol)
+            return y_new[0], z[0], q[0]
+        batch = x.shape[0]
+        # inner latent refinement, conditioned on the committed board and the current answer
+        exy, ey = self._condition(x, y)
+        if halt_threshold is None and halt_tol is None:
+            for _ in range(inner_steps):
+                z = self._inner(z, exy)
+            steps = torch.full((batch,), inner_steps, dtype=torch.long)
+            checks = 0
+        else:
+            # refine only the samples still active; finished ones keep their z
+            active = torch.arange(batch, device=z.device)
+            steps = torch.zeros(batch, dtype=torch.long, device=z.device)
+            checks = 0
+            for _ in range(inner_steps):
+                z_act = z.index_select(0, active)
+                z_new = self._inner(z_act, exy.index_select(0, active))
+                z = z.index_copy(0, active, z_new)
+                steps[active] += 1
+                done = torch.zeros(len(active), dtype=torch.bool, device=z.device)
+                if halt_threshold is not None:
+                    done |= self._halt(z_new) >= halt_threshold
+                    checks += len(active)
+                if halt_tol is not None:
+                    done |= (z_new - z_act).abs().flatten(1).amax(-1) < halt_tol
+                active = active[~done]
+                if len(active) == 0:
+                    break
+            steps = steps.cpu()
+        # answer update
+        y_new = self._answer(z, ey)
+        q = self._halt(z)  # [B] in [0,1]
+        run = int(steps.sum())
+        outer, inner, check = self._flops(y.shape[1])
+        self.last_steps = steps
+        self.calls += 1
+        self.samples += batch
+        self.inner_steps_run += run
+        self.flops += batch * outer + run * inner + checks * check
+        return y_new, z, q
+
+    def reset_counters(self):
+        self.calls = 0
+        self.samples = 0
+        self.inner_steps_run = 0
+        self.flops = 0
+
+    def counters(self) -> dict:
+        """Totals since the last reset, with expected inner steps and FLOPs per sample."""
+        per = max(1, self.samples)
+        return {
+            "calls": self.calls,
+            "samples": self.samples,
+            "inner_steps": self.inner_steps_run,
+            "expected_inner_steps": self.inner_steps_run / per,
+            "flops": self.flops,
+            "flops_per_sample": self.flops / per,
+        }
+
+
+class SharedTRM(RecursiveModel):
+    """
+    A compact TRM-like module over the whole board, for one fixed n.
+    x [B,2n] (encode_boards), y = row logits [B,n,n], z = latent [B,h].
+    Parameters and activations grow as O(n^2 h).
+    """
+    def __init__(self, n: int, h: int):
+        super().__init__(n, h)
+        self.enc_x = nn.Linear(2 * n, h)
+        self.enc_y = nn.Linear(n * n, h)
+        self.fz = nn.Sequential(
+            nn.Linear(h + h, h),
+            nn.ReLU(),
+            nn.Linear(h, h),
+        )
+        self.fy = nn.Sequential(
+            nn.Linear(h + h, h),
+            nn.ReLU(),
+            nn.Linear(h, n * n),
+        )
+        self.halt = nn.Sequential(nn.Linear(h, 1), nn.Sigmoid())
+
+    def encode(self, boards) -> torch.Tensor:
+        return encode_boards(boards, self.n)
+
+    def initial_state(self, batch: int, n: int) -> tuple[torch.Tensor, torch.Tensor]:
+        return torch.zeros(batch, n, n, device=DEVICE), torch.zeros(batch, self.h, device=DEVICE)
+
+    def _condition(self, x, y):
+        ex = torch.tanh(self.enc_x(x))
+        ey = torch.tanh(self.enc_y(y.flatten(1)))
+        return ex + ey, ey
+
+    def _inner(self, z, exy):
+        return torch.tanh(self.fz(torch.cat([z, exy], dim=-1)))
+
+    def _answer(self, z, ey):
+        return self.fy(torch.cat([z, ey], dim=-1)).view(-1, self.n, self.n)
+
+    def _halt(self, z):
+        return self.halt(z).squeeze(-1)
+
+    def _flops(self, n: int) -> tuple[int, int, int]:
+        h = self.h
+        outer = 2 * (2 * n * h + n * n * h) + 2 * (2 * h * h + h * n * n) + 2 * h   # encoders, fy, halt
+        return outer, 2 * (2 * h * h + h * h), 2 * h                                # fz, halt
+
+    def row_logits(self, y, boards=None):
+        return y
+
+
+class ColumnTRM(RecursiveModel):
+    """
+    Column-factorized TRM: every layer is shared across columns, so one set of weights
+    works for any n and activations grow as O(n h).
+    - x [B,n,F]: per column occupancy, row and column position, and how many other queens
+      share the queen's row, diagonal and anti-diagonal (computed in O(n) from line counts)
+    - y [B,n,h] per-column answer latent, z [B,n,h] per-column reasoning latent
+    - inner step: columns exchange information through a depthwise convolution (neighbours)
+      and multi-head attention (scaled_dot_product_attention, memory-efficient kernels)
+    - rows are read out per column: a query from y scored against a Fourier embedding of
+      each row position, minus a learned weight times the conflicts a queen would have there
+      (the min-conflicts signal). decode() does this in column chunks, so the n x n score
+      matrix is never materialized
+    `n` is only the board size the model was built or trained for.
+    """
+    any_n = True
+    x_dims = 2
+    FEATURES = 6
+    FREQS = 16           # Fourier features of the row position
+
+    def __init__(self, n: int, h: int, heads: int = 4, kernel: int = 5):
+        super().__init__(n, h)
+        self.heads = heads
+        self.kernel = kernel
+        self.enc_x = nn.Linear(self.FEATURES, h)
+        self.enc_y = nn.Linear(h, h)
+        self.conv = nn.Conv1d(h, h, kernel, padding=kernel // 2, groups=h)
+        self.qkv = nn.Linear(h, 3 * h)
+        self.mix = nn.Linear(h, h)
+        self.fz = nn.Sequential(
+            nn.Linear(h + h, h),
+            nn.ReLU(),
+            nn.Linear(h, h),
+        )
+        self.fy = nn.Linear(h + h, h)
+        self.halt = nn.Sequential(nn.Linear(h, 1), nn.Sigmoid())
+        self.row_q = nn.Linear(h, h)
+        self.row_emb = nn.Linear(2 * self.FREQS, h)
+        self.conflict_weight = nn.Parameter(torch.tensor(1.0))
+
+    def config(self) -> dict:
+        return {"heads": self.heads, "kernel": self.kernel}
+
+    def encode(self, boards) -> torch.Tensor:
+        rows = board_tensor(boards).to(DEVICE)
+        b, n = rows.shape
+        row, diag, anti = line_counts(rows)
+        r = rows.clamp(min=0)
+        c = torch.arange(n, device=rows.device).expand(b, n)
+        occ = (rows >= 0).float()
+        others = [occ * torch.log1p(counts.gather(1, idx) - 1).clamp(min=0)
+                  for counts, idx in ((row, r), (diag, r - c + n - 1), (anti, r + c))]
+        scale = max(1, n - 1)
+        return torch.stack([occ, occ * r / scale, c / scale, *others], dim=-1)
+
+    def initial_state(self, batch: int, n: int) -> tuple[torch.Tensor, torch.Tensor]:
+        return (torch.zeros(batch, n, self.h, device=DEVICE), torch.zeros(batch, n, self.h, device=DEVICE))
+
+    def _condition(self, x, y):
+        ex = torch.tanh(self.enc_x(x))
+        ey = torch.tanh(self.enc_y(y))
+        return ex + ey, ey
+
+    def _inner(self, z, exy):
+        u = z + exy
+        b, n, h = u.shape
+        local = self.conv(u.transpose(1, 2)).transpose(1, 2)
+        q, k, v = self.qkv(u).view(b, n, 3, self.heads, h // self.heads).permute(2, 0, 3, 1, 4)
+        glob = F.scaled_dot_product_attention(q, k, v).transpose(1, 2).reshape(b, n, h)
+        return torch.tanh(self.fz(torch.cat([z, exy + local + self.mix(glob)], dim=-1)))
+
+    def _answer(self, z, ey):
+        return torch.tanh(self.fy(torch.cat([z, ey], dim=-1)))
+
+    def _halt(self, z):
+        return self.halt(z.mean(1)).squeeze(-1)
+
+    def _flops(self, n: int) -> tuple[int, int, int]:
+        h = self.h
+        outer = 2 * n * (self.FEATURES * h + h * h + 2 * h * h) + 2 * h             # encoders, fy, halt
+        inner = 2 * n * (self.kernel * h + 4 * h * h + 3 * h * h) + 4 * n * n * h    # conv, qkv+mix, fz, attention
+        return outer, inner, 2 * h
+
+    def _row_embedding(self, n: int) -> torch.Tensor:
+        pos = torch.arange(n, device=DEVICE, dtype=torch.float32) / max(1, n - 1)
+        ang = pos[:, None] * math.pi * torch.arange(1, self.FREQS + 1, device=DEVICE)
+        return self.row_emb(torch.cat([ang.sin(), ang.cos()], dim=-1))                 # [n, h]
+
+    def _scores(self, y, rows, counts, emb, cols: slice) -> torch.Tensor:
+        """Row logits [B, len(cols), n] for a range of columns."""
+        row, diag, anti = counts
+        b, n = rows.shape
+        r = torch.arange(n, device=rows.device)
+        c = torch.arange(n, device=rows.device)[cols]
+        # conflicts a queen in column c would have at row r, not counting its own queen
+        hits = row[:, None, :] + diag[:, (r[None, :] - c[:, None] + n - 1)] + anti[:, (r[None, :] + c[:, None])]
+        own = rows[:, cols, None] == r[None, None, :]
+        hits = hits - 3.0 * own
+        query = self.row_q(y[:, cols])
+        return query @ emb.T / math.sqrt(self.h) - F.softplus(self.conflict_weight) * hits
+
+    def row_logits(self, y, boards):
+        rows = board_tensor(boards).to(y.device)
+        return self._scores(y, rows, line_counts(rows), self._row_embedding(rows.shape[1]), slice(None))
+
+    def decode(self, y, boards, chunk_cells: int = 1 << 20) -> torch.Tensor:
+        with torch.inference_mode():
+            rows = board_tensor(boards).to(y.device)
+            b, n = rows.shape
+            counts, emb = line_counts(rows), self._row_embedding(n)
+            step = max(1, chunk_cells // max(1, b * n))
+            out = [self._scores(y, rows, counts, emb, slice(i, i + step)).argmax(-1) for i in range(0, n, step)]
+            return torch.cat(out, dim=1).cpu()
+
+
+# ========= Checkpoints =========
+# One torch.save zip file: {"format", "model", "n", "h", "inner_steps", "meta", "state_dict"}.
+# Loading memory-maps it (torch.load(mmap=True)) and builds the module on the meta device,
+# then assigns the mapped tensors as parameters instead of copying them. Processes on one
+# host that load the same file therefore share its page-cache pages, and a cold start costs
+# little more than reading the header. Files are replaced atomically on save, so processes
+# that still map the previous version keep a consistent view.
+CKPT_FORMAT = "trm-ckpt-1"
+MODELS = {"SharedTRM": SharedTRM, "ColumnTRM": ColumnTRM}
+
+
+def save_checkpoint(model: RecursiveModel, path: str, inner_steps: int, **meta):
+    """Weights plus the metadata needed to rebuild and validate the model."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    torch.save({"format": CKPT_FORMAT, "model": type(model).__name__, "n": model.n, "h": model.h,
+                "config": model.config(), "inner_steps": inner_steps, "meta": meta,
+                "state_dict": {k: v.detach().cpu().contiguous() for k, v in model.state_dict().items()}}, tmp)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str, n: Optional[int] = None, h: Optional[int] = None,
+                    inner_steps: Optional[int] = None) -> tuple[RecursiveModel, dict]:
+    """Rebuild the model from `path` with memory-mapped weights.
+    Raises ValueError if the file is not a checkpoint or n/h/inner_steps do not match the
+    expected values (when given; n is not checked for models that work for any n).
+    info["load_ms"] is the wall time of the load.
+    """
+    t0 = time.perf_counter()
+    ckpt = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    fmt = ckpt.get("format", CKPT_FORMAT)   # files from before the format tag have the same layout
+    if fmt != CKPT_FORMAT:
+        raise ValueError(f"{path}: unknown checkpoint format {fmt!r}")
+    cls = MODELS.get(ckpt.get("model", "SharedTRM"))
+    if cls is None:
+        raise ValueError(f"{path}: unknown model {ckpt.get('model')!r}")
+    for key, want in (("n", n), ("h", h), ("inner_steps", inner_steps)):
+        if want is not None and ckpt[key] != want and not (key == "n" and cls.any_n):
+            raise ValueError(f"checkpoint {path} has {key}={ckpt[key]}, expected {want}")
+    config = ckpt.get("config", {})   # older files only hold models built with the defaults
+    with torch.device("meta"):
+        model = cls(ckpt["n"], ckpt["h"], **config)
+    model.load_state_dict(ckpt["state_dict"], assign=True)   # keeps the mapped storage
+    model.requires_grad_(False)
+    if DEVICE.type != "cpu":
+        model = model.to(DEVICE)                              # one copy into device memory
+    info = {"model": cls.__name__, "n": ckpt["n"], "h": ckpt["h"], **config, "inner_steps": ckpt["inner_steps"],
+            **ckpt["meta"],
+            "load_ms": 1000.0 * (time.perf_counter() - t0)}
+    return model.eval(), info
+
+
+# ========= Cold-start measurement =========
+def _cold_start(path: str, out) -> None:
+    t0 = time.perf_counter()
+    model, info = load_checkpoint(path)
+    with torch.inference_mode():
+        y, z = model.initial_state(1, model.n)
+        model.improve(model.encode([list(range(model.n))]), y, z, info["inner_steps"])
+    first_ms = 1000.0 * (time.perf_counter() - t0)
+    mem = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:     # Linux: how much of our memory is shared
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Private_Clean", "Private_Dirty"):
+                    mem[key.lower() + "_kb"] = int(rest.split()[0])
+    except OSError:
+        pass
+    out.put({"pid": os.getpid(), "load_ms": info["load_ms"], "first_forward_ms": first_ms, **mem})
+
+
+def measure_cold_start(path: str, processes: int = 4) -> List[dict]:
+    """Start `processes` fresh interpreters that load `path` at the same time."""
+    import multiprocessing as mp
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_cold_start, args=(path, out)) for _ in range(processes)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python trm_model.py CHECKPOINT [PROCESSES]")
+    for r in measure_cold_start(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 4):
+        print(f"[Checkpoint] {r}")
@@ -0,0 +1,126 @@
+# proposers.py
+# Pluggable proposal backends for the n-Queens Coordinator.
+# A proposer takes the TRM-style state (x, y, z) and returns a new board y', an updated
+# latent z', a halting probability and a short rationale. The Coordinator only talks to
+# this interface, so LLM, TRM and classical backends are interchangeable per run and all
+# drive the same SET_ROWS/ACK protocol to the queens.
+#
+# Usage:
+#   proposer = LLMProposer(TinyLlamaClient())          # any client with async improve()
+#   proposer = MinConflictsProposer(n, seed=0)          # classical local search
+#   proposer = SpeculativeProposer([p0, p1, p2])        # k proposals per step, keep the best
+#   rows, halt, why, z = await proposer.propose(n, x_rows, y_rows, z_text, step)
+
+import asyncio
+from typing import List, Optional, Tuple
+
+from conflict_index import conflicts
+from min_conflicts import MinConflictsSolver
+
+Proposal = Tuple[List[int], float, str, str]   # (rows, halt, why, z)
+
+
+class Proposer:
+    """Base class: subclasses implement `propose` and may override `close`."""
+    name = "base"
+
+    async def propose(self, n: int, x_rows: List[int], y_rows: List[int], z_text: str, step: int) -> Proposal:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class LLMProposer(Proposer):
+    """Wraps an LLM client exposing `async improve(n, x, y, z, step)` (TinyLlamaClient)."""
+    name = "llm"
+
+    def __init__(self, client):
+        self.client = client
+
+    async def propose(self, n, x_rows, y_rows, z_text, step):
+        return await self.client.improve(n, x_rows, y_rows, z_text, step)
+
+    async def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            await close()
+
+
+class MinConflictsProposer(Proposer):
+    """Classical min-conflicts/tabu search. Each outer step runs at most `moves_per_step`
+    repair moves in a worker thread, so the event loop keeps serving ACKs on large boards.
+    """
+    name = "minconf"
+
+    def __init__(self, n: int, seed: Optional[int] = None, moves_per_step: int = 1000):
+        self.solver = MinConflictsSolver(n, seed=seed)
+        self.moves_per_step = moves_per_step
+
+    def propose_sync(self, y_rows: List[int], z_text: str) -> Proposal:
+        """Blocking variant of `propose`, for callers that batch work into one thread."""
+        if self.solver.index is None:
+            self.solver.reset()           # greedy start beats any given board by far
+        else:
+            self.solver.sync(y_rows)      # follow the coordinator if it rejected a proposal
+        left = self.solver.step(self.moves_per_step)
+        halt = 1.0 if left == 0 else 0.0
+        why = f"min-conflicts: {self.solver.moves} moves, {left} conflicts left"
+        return list(self.solver.rows), halt, why, z_text
+
+    async def propose(self, n, x_rows, y_rows, z_text, step):
+        return await asyncio.to_thread(self.propose_sync, y_rows, z_text)
+
+
+class SpeculativeProposer(Proposer):
+    """Fires one proposal per candidate (e.g. different temperatures or seeds) concurrently,
+    at most `max_inflight` at a time, and returns the one with the fewest conflicts.
+    Stragglers are cancelled as soon as a conflict-free board arrives.
+    """
+    name = "speculative"
+
+    def __init__(self, candidates: List[Proposer], max_inflight: Optional[int] = None):
+        if not candidates:
+            raise ValueError("need at least one candidate proposer")
+        self.candidates = list(candidates)
+        self.max_inflight = max(1, max_inflight or len(self.candidates))
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    async def _run(self, cand: Proposer, n, x_rows, y_rows, z_text, step) -> Tuple[int, Proposal]:
+        async with self._sem:
+            proposal = await cand.propose(n, x_rows, y_rows, z_text, step)
+        return conflicts(proposal[0]), proposal
+
+    async def propose(self, n, x_rows, y_rows, z_text, step):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_inflight)
+        tasks = [
+            asyncio.create_task(self._run(c, n, x_rows, y_rows, z_text, step))
+            for c in self.candidates
+        ]
+        best: Optional[Tuple[int, Proposal]] = None
+        errors = []
+        try:
+            for fut in asyncio.as_completed(tasks):
+                try:
+                    conf, proposal = await fut
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if best is None or conf < best[0]:
+                    best = (conf, proposal)
+                if conf == 0:
+                    break
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if best is None:
+            raise RuntimeError(f"all {len(tasks)} proposals failed: {errors[0]}")
+        conf, (rows, halt, why, z_new) = best
+        return rows, halt, f"[best of {len(tasks)}: {conf}] {why}", z_new
+
+    async def close(self):
+        for c in self.candidates:
+            await c.close()
@@ -0,0 +1,191 @@
+# raster_render.py
+# Pure NumPy renderer for n-Queens boards (no matplotlib).
+# The board is painted straight into an H x W x 3 uint8 array: a cached checkerboard
+# background, one sprite per queen (crown bitmap scaled to the cell, or a filled square on
+# small cells), conflicted queens and their cells in red, and a header line written with a
+# tiny 3x5 bitmap font. Boards larger than max_px are downsampled: each pixel covers a
+# f x f block of cells and shows the "worst" queen inside it (conflicted > queen > empty).
+#
+# Usage:
+#   frame = raster_frame(n, rows, step)              # np.ndarray, feed it to frame_writer
+#   render_png_raster(n, rows, step, out_dir)        # same file layout as render_png
+
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# ================= Config =================
+MAX_PX = 1024            # longest board side in pixels; larger boards are downsampled
+MIN_SPRITE_CELL = 8      # cells at least this big get the crown sprite, smaller ones a square
+FONT_SCALE = 2           # header glyphs are 3x5 pixels times this
+LIGHT = (255, 255, 255)
+DARK = (232, 241, 248)   # same tones as the matplotlib renderers
+QUEEN = (0, 0, 0)
+CONFLICT = (214, 39, 40)
+CONFLICT_CELL = (250, 210, 210)
+HEADER_BG = (255, 255, 255)
+HEADER_FG = (0, 0, 0)
+
+# 5 rows x 3 columns per glyph, '#' = ink
+_FONT_ROWS = {
+    "0": ["###", "#.#", "#.#", "#.#", "###"],
+    "1": [".#.", "##.", ".#.", ".#.", "###"],
+    "2": ["###", "..#", "###", "#..", "###"],
+    "3": ["###", "..#", "###", "..#", "###"],
+    "4": ["#.#", "#.#", "###", "..#", "..#"],
+    "5": ["###", "#..", "###", "..#", "###"],
+    "6": ["###", "#..", "###", "#.#", "###"],
+    "7": ["###", "..#", ".#.", ".#.", ".#."],
+    "8": ["###", "#.#", "###", "#.#", "###"],
+    "9": ["###", "#.#", "###", "..#", "###"],
+    "C": ["###", "#..", "#..", "#..", "###"],
+    "E": ["###", "#..", "###", "#..", "###"],
+    "F": ["###", "#..", "###", "#..", "#.."],
+    "I": ["###", ".#.", ".#.", ".#.", "###"],
+    "L": ["#..", "#..", "#..", "#..", "###"],
+    "N": ["##.", "#.#", "#.#", "#.#", "#.#"],
+    "O": ["###", "#.#", "#.#", "#.#", "###"],
+    "P": ["###", "#.#", "###", "#..", "#.."],
+    "S": ["###", "#..", "###", "..#", "###"],
+    "T": ["###", ".#.", ".#.", ".#.", ".#."],
+    ":": ["...", ".#.", "...", ".#.", "..."],
+    " ": ["...", "...", "...", "...", "..."],
+}
+FONT = {ch: np.array([[c == "#" for c in row] for row in rows]) for ch, rows in _FONT_ROWS.items()}
+
+# 12 x 12 crown, scaled to the cell with nearest-neighbour sampling
+_CROWN = [
+    "............",
+    ".#...##...#.",
+    ".#...##...#.",
+    ".##..##..##.",
+    ".##.####.##.",
+    ".##########.",
+    ".##########.",
+    "..########..",
+    "..########..",
+    "............",
+    ".##########.",
+    ".##########.",
+]
+CROWN = np.array([[c == "#" for c in row] for row in _CROWN])
+
+
+def text_mask(text: str, scale: int = FONT_SCALE) -> np.ndarray:
+    """Boolean ink mask for `text` in the 3x5 font (unknown characters render as blanks)."""
+    glyphs = []
+    for ch in text.upper():
+        glyphs.append(FONT.get(ch, FONT[" "]))
+        glyphs.append(np.zeros((5, 1), dtype=bool))          # 1px letter spacing
+    mask = np.hstack(glyphs) if glyphs else np.zeros((5, 0), dtype=bool)
+    return np.kron(mask, np.ones((scale, scale), dtype=bool))
+
+
+def sprite_mask(cell: int) -> np.ndarray:
+    if cell < MIN_SPRITE_CELL:
+        inset = cell // 4
+        mask = np.zeros((cell, cell), dtype=bool)
+        mask[inset:cell - inset, inset:cell - inset] = True
+        if not mask.any():
+            mask[:] = True
+        return mask
+    idx = np.arange(cell) * CROWN.shape[0] // cell
+    return CROWN[np.ix_(idx, idx)]
+
+
+def conflicted_mask(rows: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Per column: does this queen share a row or diagonal with another one? Also the pair count."""
+    n = len(rows)
+    cols = np.arange(n)
+    row_count = np.bincount(rows, minlength=n)
+    diag_count = np.bincount(rows - cols + n - 1, minlength=2 * n - 1)
+    anti_count = np.bincount(rows + cols, minlength=2 * n - 1)
+    mask = (row_count[rows] > 1) | (diag_count[rows - cols + n - 1] > 1) | (anti_count[rows + cols] > 1)
+    pairs = sum(int((k * (k - 1) // 2).sum()) for k in (row_count, diag_count, anti_count))
+    return mask, pairs
+
+
+class RasterBoard:
+    """Background and sprite cache for one board size."""
+    def __init__(self, n: int, max_px: int = MAX_PX, annotate_conflicts: bool = True):
+        self.n = n
+        self.annotate_conflicts = annotate_conflicts
+        if n <= max_px:
+            self.factor = 1                                  # cells per pixel (downsampling)
+            self.cell = max(1, max_px // n)                  # pixels per cell
+        else:
+            self.factor = math.ceil(n / max_px)
+            self.cell = 1
+        self.side = math.ceil(n / self.factor) * self.cell
+        self.header = 5 * FONT_SCALE + 2 * FONT_SCALE
+        parity = np.add.outer(np.arange(self.side // self.cell), np.arange(self.side // self.cell)) % 2
+        board = np.where(parity[..., None] == 1, np.array(DARK, np.uint8), np.array(LIGHT, np.uint8))
+        board = np.repeat(np.repeat(board, self.cell, axis=0), self.cell, axis=1)
+        self.background = np.empty((self.header + self.side, self.side, 3), dtype=np.uint8)
+        self.background[:self.header] = HEADER_BG
+        self.background[self.header:] = board
+        # finished cell tiles for the sprite path, keyed by (square parity, conflicted)
+        sprite = sprite_mask(self.cell)
+        self.tiles = {}
+        for parity_bit, square in ((0, LIGHT), (1, DARK)):
+            for bad, (bg, fg) in ((False, (square, QUEEN)), (True, (CONFLICT_CELL, CONFLICT))):
+                tile = np.empty((self.cell, self.cell, 3), dtype=np.uint8)
+                tile[:] = bg
+                tile[sprite] = fg
+                self.tiles[(parity_bit, bad)] = tile
+
+    def render(self, rows: List[int], step: Optional[int] = None) -> np.ndarray:
+        img = self.background.copy()
+        r = np.asarray(rows, dtype=np.int64)
+        c = np.arange(len(r))
+        if self.annotate_conflicts:
+            bad, pairs = conflicted_mask(r)
+        else:
+            bad, pairs = np.zeros(len(r), dtype=bool), 0
+        if self.cell == 1:
+            # one pixel per cell (or per block of cells): conflicted queens drawn last win
+            img[self.header + r[~bad] // self.factor, c[~bad] // self.factor] = QUEEN
+            img[self.header + r[bad] // self.factor, c[bad] // self.factor] = CONFLICT
+        else:
+            k = self.cell
+            for col, row, b in zip(c.tolist(), r.tolist(), bad.tolist()):
+                y = self.header + row * k
+                img[y:y + k, col * k:col * k + k] = self.tiles[((row + col) % 2, b)]
+        label = f"STEP {step}" if step is not None else ""
+        if self.annotate_conflicts:
+            label += f"  CONFLICTS {pairs}"
+        self._text(img, label.strip())
+        return img
+
+    def _text(self, img: np.ndarray, text: str):
+        mask = text_mask(text)[:, : img.shape[1] - FONT_SCALE]
+        h, w = mask.shape
+        region = img[FONT_SCALE:FONT_SCALE + h, FONT_SCALE:FONT_SCALE + w]
+        region[mask] = HEADER_FG
+
+
+_BOARDS: Dict[Tuple[int, int, bool], RasterBoard] = {}   # per process
+
+
+def raster_board(n: int, annotate_conflicts: bool = True, max_px: int = MAX_PX) -> RasterBoard:
+    board = _BOARDS.get((n, max_px, annotate_conflicts))
+    if board is None:
+        board = _BOARDS[(n, max_px, annotate_conflicts)] = RasterBoard(n, max_px, annotate_conflicts)
+    return board
+
+
+def raster_frame(n: int, rows: List[int], step: Optional[int] = None, annotate_conflicts: bool = True,
+                 max_px: int = MAX_PX) -> np.ndarray:
+    return raster_board(n, annotate_conflicts, max_px).render(rows, step)
+
+
+def render_png_raster(n: int, rows: List[int], step: int, out_dir: str, annotate_conflicts: bool = True) -> str:
+    """Same output file as render_png, painted with NumPy and saved with Pillow."""
+    from PIL import Image
+
+    frame_path = os.path.join(out_dir, f"step_{step:03d}.png")
+    Image.fromarray(raster_frame(n, rows, step, annotate_conflicts)).save(frame_path, compress_level=1)
+    print(f"[Visualizer] wrote {frame_path}")
+    return frame_path
@@ -0,0 +1,145 @@
+# render_pool.py
+# Runs frame rendering off the event loop, in a process pool behind a bounded queue.
+# submit() never waits on a render: up to `workers` frames are
+# rendering at once and up to `max_pending` more wait in the queue. When the queue is full
+# the policy decides what happens to the next frame:
+#   "block"   lossless: the frame waits in line past the bound; callers that can await use
+#             `await pool.put(...)`, which waits (without blocking the event loop) until there
+#             is room, so the producer is slowed down instead
+#   "drop"    discard the new frame (the queued frames are kept)
+#   "latest"  the new frame replaces the newest queued one, so the last board always renders
+#
+# Usage:
+#   pool = RenderPool(render_png, workers=1, max_pending=4, policy="latest")
+#   pool.submit(n, rows, step, out_dir)     # any picklable args for the render function
+#   await pool.put(n, rows, step, out_dir)  # same, but waits for room under "block"
+#   ...
+#   await pool.run(fn, *args)               # one-off call after the queued frames, e.g. a flush
+#   await pool.close()                      # renders what is queued, then shuts the pool down
+
+import asyncio
+import concurrent.futures as cf
+from collections import deque
+from typing import Callable, Deque, Optional, Set, Tuple
+
+# ================= Config =================
+RENDER_WORKERS = 1          # processes rendering frames
+RENDER_QUEUE = 4            # frames allowed to wait for a worker
+RENDER_POLICY = "latest"    # "block", "drop" or "latest" when the queue is full
+
+POLICIES = ("block", "drop", "latest")
+
+
+class RenderPool:
+    def __init__(self, fn: Callable, workers: int = RENDER_WORKERS, max_pending: int = RENDER_QUEUE,
+                 policy: str = RENDER_POLICY, executor: Optional[cf.Executor] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown policy {policy!r}; choose from {POLICIES}")
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.max_pending = max(0, max_pending)
+        self.policy = policy
+        self._executor = executor
+        self._own_executor = executor is None
+        self._running: Set[cf.Future] = set()
+        self._pending: Deque[Tuple] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # stats
+        self.submitted = 0
+        self.rendered = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.errors = 0
+
+    def _get_executor(self) -> cf.Executor:
+        if self._executor is None:
+            self._executor = cf.ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def submit(self, *args):
+        """Queue one render. Always returns immediately; it runs on the event loop."""
+        self.submitted += 1
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self._reap()
+        if len(self._running) < self.workers:
+            self._start(args)
+            return
+        if len(self._pending) < self.max_pending:
+            self._pending.append(args)
+            return
+        if self.policy == "block":
+            self.blocked += 1
+            self._pending.append(args)
+        elif self.policy == "latest" and self._pending:
+            self._pending[-1] = args
+            self.dropped += 1
+        else:
+            self.dropped += 1
+
+    async def put(self, *args):
+        """Like submit(), but under "block" first wait until the queue has room."""
+        if self.policy == "block":
+            self._reap()
+            self._pump()
+            while len(self._running) >= self.workers and len(self._pending) >= self.max_pending:
+                await asyncio.wait([asyncio.wrap_future(f) for f in list(self._running)],
+                                   return_when=asyncio.FIRST_COMPLETED)
+                self._reap()
+                self._pump()
+        self.submit(*args)
+
+    def _start(self, args: Tuple):
+        fut = self._get_executor().submit(self.fn, *args)
+        self._running.add(fut)
+        fut.add_done_callback(lambda _: self._loop.call_soon_threadsafe(self._on_done))
+
+    def _on_done(self):
+        self._reap()
+        self._pump()
+
+    def _reap(self):
+        for fut in [f for f in self._running if f.done()]:
+            self._running.discard(fut)
+            if fut.cancelled() or fut.exception() is not None:
+                self.errors += 1
+                if not fut.cancelled():
+                    print(f"[RenderPool] render failed: {fut.exception()!r}")
+            else:
+                self.rendered += 1
+
+    def _pump(self):
+        while self._pending and len(self._running) < self.workers:
+            self._start(self._pending.popleft())
+
+    @property
+    def backlog(self) -> int:
+        return len(self._running) + len(self._pending)
+
+    async def drain(self):
+        """Wait until every queued frame has been rendered."""
+        while self._running or self._pending:
+            self._pump()
+            if self._running:
+                await asyncio.wait([asyncio.wrap_future(f) for f in list(self._running)])
+            self._reap()
+
+    async def run(self, fn: Callable, *args):
+        """Run `fn` in the pool after every queued frame (never dropped), and return its result."""
+        await self.drain()
+        return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+
+    async def close(self):
+        await self.drain()
+        if self._own_executor and self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "rendered": self.rendered,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "errors": self.errors,
+        }
@@ -0,0 +1,128 @@
+# standin_ollama.py
+# Local stand-in for the Ollama HTTP API, for benchmarks and offline runs.
+# Serves POST /api/chat and /api/generate on 127.0.0.1 (stdlib asyncio only). Each reply
+# takes the board from the request ("y" for the TRM-style prompt, "board" for main.py),
+# applies a few min-conflicts swaps and returns the usual {"rows", "halt", "why", "z"}
+# JSON. Replies are deterministic for a given seed and board, honour "stream": true
+# (NDJSON over chunked transfer) and can add a fixed latency to mimic a real model.
+#
+# Usage:
+#   server = StandInOllama(seed=0, latency_s=0.02)
+#   await server.start()
+#   client = OllamaClient(server.url)
+#   ...
+#   await server.stop()
+
+import asyncio
+import json
+import zlib
+from typing import Optional
+
+from min_conflicts import MinConflictsSolver
+
+# ================= Config =================
+STANDIN_MOVES = 1         # min-conflicts swaps per reply (a "model" that fixes one thing per step)
+STANDIN_LATENCY_S = 0.02  # simulated model latency per reply
+STREAM_PIECE = 12         # characters per streamed chunk
+
+
+class StandInOllama:
+    def __init__(self, seed: int = 0, latency_s: float = STANDIN_LATENCY_S, moves: int = STANDIN_MOVES,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.seed = seed
+        self.latency_s = latency_s
+        self.moves = moves
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/api"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ---------- model ----------
+    def _answer(self, user: dict) -> str:
+        n = int(user.get("n", 0))
+        board = user.get("y") or user.get("board") or list(range(n))
+        solver = MinConflictsSolver(n, seed=zlib.crc32(f"{self.seed}:{board}".encode()))
+        solver.sync(board)
+        left = solver.step(self.moves)
+        return json.dumps({
+            "rows": list(solver.rows),
+            "halt": 1.0 if left == 0 else 0.0,
+            "why": f"stand-in: {left} conflicts left",
+            "z": f"conflicts={left}",
+        })
+
+    def _user_of(self, endpoint: str, body: dict) -> dict:
+        if endpoint == "chat":
+            text = body["messages"][-1]["content"]
+        else:
+            text = body["prompt"]
+            text = text[text.find("{"):]
+        return json.loads(text)
+
+    # ---------- HTTP ----------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = lines[0].split(" ", 2)
+                headers = {k.strip().lower(): v.strip() for k, v in (l.split(":", 1) for l in lines[1:] if ":" in l)}
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+                if method != "POST" or endpoint not in ("chat", "generate"):
+                    await self._send(writer, 404, b'{"error": "not found"}')
+                    continue
+                self.requests += 1
+                req = json.loads(body)
+                content = self._answer(self._user_of(endpoint, req))
+                if self.latency_s > 0:
+                    await asyncio.sleep(self.latency_s)
+                if req.get("stream"):
+                    await self._send_stream(writer, endpoint, req.get("model", ""), content)
+                else:
+                    await self._send(writer, 200, json.dumps(self._chunk(endpoint, req.get("model", ""), content, True)).encode())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _chunk(endpoint: str, model: str, piece: str, done: bool) -> dict:
+        if endpoint == "chat":
+            return {"model": model, "message": {"role": "assistant", "content": piece}, "done": done}
+        return {"model": model, "response": piece, "done": done}
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, payload: bytes):
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+
+    async def _send_stream(self, writer: asyncio.StreamWriter, endpoint: str, model: str, content: str):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n"
+        )
+        pieces = [content[i:i + STREAM_PIECE] for i in range(0, len(content), STREAM_PIECE)]
+        for piece in pieces + [""]:
+            line = (json.dumps(self._chunk(endpoint, model, piece, piece == "")) + "\n").encode()
+            writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
@@ -0,0 +1,162 @@
+# stream_parse.py
+# Incremental validation of streamed LLM board proposals.
+# The model is asked for a JSON object with an integer list "rows" of length n. Fed the
+# response piece by piece, RowsStreamParser checks "rows" while tokens arrive and raises
+# StreamAborted as soon as the answer is provably unusable (non-integer or out-of-range
+# entry, too many or too few entries, rows not a list, no rows at all, or the output grows
+# past a size cap), so the caller can drop the connection and stop the generation.
+#
+# Usage:
+#   parser = RowsStreamParser(n, max_chars=4000)
+#   for piece in stream:
+#       parser.feed(piece)            # raises StreamAborted(reason)
+#   parser.text                       # full text received so far
+
+from typing import List, Optional
+
+DIGITS = "0123456789"
+WHITESPACE = " \t\r\n"
+
+
+class StreamAborted(RuntimeError):
+    """The streamed response was abandoned before completion."""
+
+
+class RowsStreamParser:
+    def __init__(self, n: int, max_chars: Optional[int] = None):
+        self.n = n
+        self.max_chars = max_chars
+        self.rows: List[int] = []
+        self.rows_done = False
+        self._parts: List[str] = []
+        self._size = 0
+        self._stack: List[str] = []     # open '{' / '['
+        self._started = False
+        self._closed = False
+        self._in_str = False
+        self._esc = False
+        self._str_buf: List[str] = []
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._await_rows = False        # saw `"rows":`, value not started yet
+        self._in_rows = False
+        self._num = ""
+        self._need_value = True         # inside rows: a number must come before ',' or ']'
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def _abort(self, reason: str):
+        raise StreamAborted(reason)
+
+    def feed(self, piece: str):
+        self._parts.append(piece)
+        self._size += len(piece)
+        if self.max_chars is not None and self._size > self.max_chars:
+            self._abort(f"response longer than {self.max_chars} chars")
+        for ch in piece:
+            self._char(ch)
+
+    # ---------- state machine ----------
+    def _char(self, ch: str):
+        if self._closed:
+            return
+        if not self._started:
+            if ch == "{":
+                self._started = True
+                self._stack.append("{")
+                self._expect_key = True
+            return
+        if self._in_str:
+            self._string_char(ch)
+            return
+        if self._in_rows:
+            self._rows_char(ch)
+            return
+        if ch in WHITESPACE:
+            return
+        if self._await_rows:
+            self._await_rows = False
+            if ch != "[":
+                self._abort("rows is not a list")
+            self._in_rows = True
+            self._need_value = True
+            self._stack.append("[")
+            return
+        depth = len(self._stack)
+        if ch == '"':
+            self._in_str = True
+            self._str_buf = []
+        elif ch == ":":
+            if depth == 1:
+                self._expect_key = False
+                if self._key == "rows":
+                    self._await_rows = True
+        elif ch == ",":
+            if depth == 1:
+                self._expect_key = True
+        elif ch in "{[":
+            self._stack.append(ch)
+        elif ch in "}]":
+            if self._stack:
+                self._stack.pop()
+            if not self._stack:
+                self._closed = True
+                if not self.rows_done:
+                    self._abort("object closed without rows")
+
+    def _string_char(self, ch: str):
+        if self._esc:
+            self._esc = False
+        elif ch == "\\":
+            self._esc = True
+        elif ch == '"':
+            self._in_str = False
+            if len(self._stack) == 1 and self._expect_key:
+                self._key = "".join(self._str_buf)
+            return
+        if len(self._stack) == 1 and self._expect_key:
+            self._str_buf.append(ch)
+
+    def _rows_char(self, ch: str):
+        if ch in DIGITS or (ch == "-" and not self._num):
+            self._num += ch
+            if self._num.startswith("-") and self._num not in ("-", "-0"):
+                self._abort(f"negative row {self._num}")
+            if self._num.lstrip("-") and int(self._num) >= self.n:
+                self._abort(f"row {self._num} out of range for n={self.n}")
+            return
+        if ch in WHITESPACE:
+            self._end_number()
+            return
+        if ch == ",":
+            self._end_number()
+            if self._need_value:
+                self._abort("empty entry in rows")
+            self._need_value = True
+            return
+        if ch == "]":
+            self._end_number()
+            if self._need_value and self.rows:
+                self._abort("trailing ',' in rows")
+            if len(self.rows) != self.n:
+                self._abort(f"rows has {len(self.rows)} entries, expected {self.n}")
+            self._in_rows = False
+            self.rows_done = True
+            self._stack.pop()
+            return
+        self._abort(f"non-integer {ch!r} in rows")
+
+    def _end_number(self):
+        if not self._num:
+            return
+        if self._num == "-":
+            self._abort("dangling '-' in rows")
+        if not self._need_value:
+            self._abort("missing ',' between rows")
+        self.rows.append(int(self._num))
+        self._num = ""
+        self._need_value = False
+        if len(self.rows) > self.n:
+            self._abort(f"rows longer than n={self.n}")